@@ -0,0 +1,35 @@
+"""job checkpoints
+
+Revision ID: 2b9f5e3c8d70
+Revises: 7d4e1b8a9c63
+Create Date: 2026-10-18 14:20:33.904512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import pgvector.sqlalchemy
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '2b9f5e3c8d70'
+down_revision: Union[str, None] = '7d4e1b8a9c63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('job_checkpoints',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('cursor', sa.String(), nullable=True),
+    sa.Column('rows_done', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('updated_at', postgresql.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('job_checkpoints')
@@ -0,0 +1,44 @@
+"""article chunks
+
+Revision ID: 7d4e1b8a9c63
+Revises: f3a86c0d52b1
+Create Date: 2026-10-18 13:41:09.264117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import pgvector.sqlalchemy
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d4e1b8a9c63'
+down_revision: Union[str, None] = 'f3a86c0d52b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('article_chunks',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('article_id', sa.UUID(), nullable=False),
+    sa.Column('chunk_index', sa.Integer(), nullable=False),
+    sa.Column('text', sa.Text(), nullable=False),
+    sa.Column('token_count', sa.Integer(), nullable=False),
+    sa.Column('embedding', pgvector.sqlalchemy.vector.VECTOR(dim=1536), nullable=False),
+    sa.ForeignKeyConstraint(['article_id'], ['external_articles.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('article_id', 'chunk_index', name='uix_article_id_chunk_index')
+    )
+    op.create_index(op.f('ix_article_chunks_article_id'), 'article_chunks', ['article_id'], unique=False)
+    # New table, no need to build the vector index concurrently
+    op.create_index('article_chunks_embedding_idx', 'article_chunks', ['embedding'], unique=False, postgresql_using='hnsw', postgresql_ops={'embedding': 'vector_ip_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('article_chunks_embedding_idx', table_name='article_chunks')
+    op.drop_index(op.f('ix_article_chunks_article_id'), table_name='article_chunks')
+    op.drop_table('article_chunks')
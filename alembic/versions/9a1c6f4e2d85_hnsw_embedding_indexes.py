@@ -0,0 +1,59 @@
+"""hnsw embedding indexes
+
+Revision ID: 9a1c6f4e2d85
+Revises: 2b9f5e3c8d70
+Create Date: 2026-10-18 15:06:52.771204
+
+Replaces the ivfflat index on thoughts (created outside of migrations, with the
+default L2 opclass that `<#>` queries can't use) with HNSW inner product
+indexes on thoughts and external_articles.
+
+Searches only read one column, so the halfvec indexes from c81f4a6d2e57 are
+dropped: this sets up the default VECTOR_STORAGE=vector. Switching to halfvec
+goes through app.jobs.vector_storage_indexes, which builds the halfvec indexes
+before the full precision ones are dropped.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import pgvector.sqlalchemy
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a1c6f4e2d85'
+down_revision: Union[str, None] = '2b9f5e3c8d70'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('thoughts', 'external_articles')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            # Build the new index before dropping the old one so searches always have one
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {table}_embedding_hnsw_idx "
+                f"ON {table} USING hnsw (embedding vector_ip_ops) WITH (m = 16, ef_construction = 64)"
+            )
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {table}_embedding_idx")
+            op.execute(f"ALTER INDEX {table}_embedding_hnsw_idx RENAME TO {table}_embedding_idx")
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {table}_embedding_half_idx")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {table}_embedding_idx")
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {table}_embedding_half_idx "
+                f"ON {table} USING hnsw (embedding_half halfvec_ip_ops)"
+            )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS thoughts_embedding_idx "
+            "ON thoughts USING ivfflat (embedding) WITH (lists = 100)"
+        )
@@ -0,0 +1,54 @@
+"""thought ingestion queue
+
+Revision ID: a4c1e7f29b30
+Revises: b98b11159d95
+Create Date: 2026-10-18 10:12:41.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import pgvector.sqlalchemy
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c1e7f29b30'
+down_revision: Union[str, None] = 'b98b11159d95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('thoughts', sa.Column('status', sa.String(), server_default='ready', nullable=False))
+    op.alter_column('thoughts', 'embedding', existing_type=pgvector.sqlalchemy.vector.VECTOR(dim=1536), nullable=True)
+    op.create_table('ingestion_jobs',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('thought_id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('status', sa.String(), server_default='queued', nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('max_attempts', sa.Integer(), server_default='3', nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('run_after', postgresql.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('locked_at', postgresql.TIMESTAMP(timezone=True), nullable=True),
+    sa.Column('created_at', postgresql.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', postgresql.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['thought_id'], ['thoughts.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_ingestion_jobs_thought_id'), 'ingestion_jobs', ['thought_id'], unique=False)
+    op.create_index('ix_ingestion_jobs_queued', 'ingestion_jobs', ['run_after'], unique=False, postgresql_where=sa.text("status = 'queued'"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_ingestion_jobs_queued', table_name='ingestion_jobs', postgresql_where=sa.text("status = 'queued'"))
+    op.drop_index(op.f('ix_ingestion_jobs_thought_id'), table_name='ingestion_jobs')
+    op.drop_table('ingestion_jobs')
+    op.execute("DELETE FROM thoughts WHERE embedding IS NULL")
+    op.alter_column('thoughts', 'embedding', existing_type=pgvector.sqlalchemy.vector.VECTOR(dim=1536), nullable=False)
+    op.drop_column('thoughts', 'status')
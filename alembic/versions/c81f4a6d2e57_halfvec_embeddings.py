@@ -0,0 +1,53 @@
+"""halfvec embeddings
+
+Revision ID: c81f4a6d2e57
+Revises: 5e2b9d0c7a14
+Create Date: 2026-10-18 11:48:05.137262
+
+Requires pgvector >= 0.7 for the halfvec type.
+
+Adding a stored generated column rewrites each table under an ACCESS EXCLUSIVE
+lock: reads and writes of thoughts and external_articles block until the
+rewrite finishes. Run it in a maintenance window on large tables. The indexes
+are built CONCURRENTLY afterwards and don't block.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import pgvector.sqlalchemy
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c81f4a6d2e57'
+down_revision: Union[str, None] = '5e2b9d0c7a14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('thoughts', 'external_articles')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        # Stored generated column: Postgres keeps the half precision copy in sync on every write
+        op.add_column(table, sa.Column(
+            'embedding_half',
+            pgvector.sqlalchemy.HALFVEC(dim=1536),
+            sa.Computed('embedding::halfvec(1536)', persisted=True),
+            nullable=True,
+        ))
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {table}_embedding_half_idx "
+                f"ON {table} USING hnsw (embedding_half halfvec_ip_ops)"
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.execute(f"DROP INDEX IF EXISTS {table}_embedding_half_idx")
+        op.drop_column(table, 'embedding_half')
@@ -0,0 +1,44 @@
+"""user profiles
+
+Revision ID: e47b2a9d1f36
+Revises: 9a1c6f4e2d85
+Create Date: 2026-10-18 16:12:40.385917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import pgvector.sqlalchemy
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'e47b2a9d1f36'
+down_revision: Union[str, None] = '9a1c6f4e2d85'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_profiles',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('embedding_sum', pgvector.sqlalchemy.vector.VECTOR(), nullable=True),
+    sa.Column('thought_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('version', sa.Integer(), server_default='1', nullable=False),
+    sa.Column('updated_at', postgresql.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.execute("""
+        INSERT INTO user_profiles (user_id, embedding_sum, thought_count)
+        SELECT user_id, sum(embedding), count(*)
+        FROM thoughts
+        WHERE embedding IS NOT NULL
+        GROUP BY user_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_profiles')
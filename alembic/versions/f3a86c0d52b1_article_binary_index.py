@@ -0,0 +1,34 @@
+"""article binary quantized index
+
+Revision ID: f3a86c0d52b1
+Revises: c81f4a6d2e57
+Create Date: 2026-10-18 13:02:41.518830
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import pgvector.sqlalchemy
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a86c0d52b1'
+down_revision: Union[str, None] = 'c81f4a6d2e57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The expression must match binary_distance_sql() for the planner to use the index
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS external_articles_embedding_bit_idx "
+            "ON external_articles USING hnsw ((binary_quantize(embedding)::bit(1536)) bit_hamming_ops)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS external_articles_embedding_bit_idx")
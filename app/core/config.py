@@ -0,0 +1,13 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Embedding model and output width. text-embedding-3 models accept any width up to
+# their native size (1536 for -small); changing it requires app.jobs.resize_embeddings.
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "1536"))
+
+# Embedding backend: "openai", "local" (ONNX Runtime on CPU) or "fake" (deterministic, offline)
+# Vectors from different models are not comparable, switching re-embeds via app.jobs.resize_embeddings.
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "openai")
@@ -0,0 +1,119 @@
+"""
+Clerk JWKS key store.
+
+Keys are fetched once, parsed into RSA public keys and indexed by `kid`.
+Stale key sets are refreshed in the background, unknown `kid`s trigger a
+single (rate limited) refetch shared by all concurrent callers.
+"""
+
+import base64
+import threading
+import time
+from typing import Optional
+
+import requests
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey, RSAPublicNumbers
+
+from app.core.logging import logger
+
+
+class JWKSError(Exception):
+    pass
+
+
+def _b64_to_int(value: str) -> int:
+    return int.from_bytes(base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)), "big")
+
+
+def _parse_jwk(key: dict) -> RSAPublicKey:
+    numbers = RSAPublicNumbers(e=_b64_to_int(key["e"]), n=_b64_to_int(key["n"]))
+    return numbers.public_key(backend=default_backend())
+
+
+class JWKSKeyStore:
+    def __init__(
+        self,
+        url: str,
+        headers: Optional[dict] = None,
+        ttl_seconds: float = 3600,
+        min_refetch_interval: float = 30,
+        timeout: float = 5,
+    ):
+        self.url = url
+        self.headers = headers or {}
+        self.ttl_seconds = ttl_seconds
+        self.min_refetch_interval = min_refetch_interval
+        self.timeout = timeout
+
+        self._keys: dict[str, RSAPublicKey] = {}
+        self._fetched_at = 0.0
+        self._generation = 0
+        self._fetch_lock = threading.Lock()
+        self._background_refresh: Optional[threading.Thread] = None
+
+    def _fetch(self) -> None:
+        response = requests.get(self.url, headers=self.headers, timeout=self.timeout)
+        response.raise_for_status()
+        jwks = response.json()
+        if "keys" not in jwks or not jwks["keys"]:
+            raise JWKSError("Invalid JWKS")
+
+        keys = {}
+        for index, key in enumerate(jwks["keys"]):
+            if key.get("kty") != "RSA":
+                continue
+            keys[key.get("kid") or str(index)] = _parse_jwk(key)
+        if not keys:
+            raise JWKSError("JWKS contains no RSA keys")
+
+        self._keys = keys
+        self._fetched_at = time.monotonic()
+        self._generation += 1
+        logger.info("jwks_refreshed", kids=list(keys.keys()))
+
+    def refresh(self, force: bool = False) -> None:
+        """Refetch the key set. Concurrent callers wait for a single in-flight fetch."""
+        generation = self._generation
+        with self._fetch_lock:
+            if self._generation != generation:
+                # Another caller refreshed while we were waiting
+                return
+            if not force and self._keys and time.monotonic() - self._fetched_at < self.min_refetch_interval:
+                return
+            self._fetch()
+
+    def _refresh_in_background(self) -> None:
+        if self._background_refresh is not None and self._background_refresh.is_alive():
+            return
+
+        def run():
+            try:
+                self.refresh(force=True)
+            except Exception as e:
+                logger.error("jwks_background_refresh_error", error=str(e))
+
+        self._background_refresh = threading.Thread(target=run, name="jwks-refresh", daemon=True)
+        self._background_refresh.start()
+
+    def get_key(self, kid: Optional[str]) -> RSAPublicKey:
+        if not self._keys:
+            self.refresh(force=True)
+        elif time.monotonic() - self._fetched_at > self.ttl_seconds:
+            # Serve the cached keys while a fresh set is fetched
+            self._refresh_in_background()
+
+        if kid is None:
+            if len(self._keys) == 1:
+                return next(iter(self._keys.values()))
+            raise JWKSError("Token header does not contain a key ID")
+
+        key = self._keys.get(kid)
+        if key is None:
+            # Keys may have been rotated since the last fetch
+            logger.info("jwks_unknown_kid", kid=kid)
+            self.refresh()
+            key = self._keys.get(kid)
+        if key is None:
+            raise JWKSError(f"Unknown signing key: {kid}")
+        return key
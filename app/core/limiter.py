@@ -10,6 +10,7 @@ rate_limits = dict(
     RATE_LIMIT_DEFAULT = parse_list_from_env("RATE_LIMIT_DEFAULT", ["1000 per day", "200 per hour"]),
     
     RATE_LIMIT_THOUGHTS_CREATE = parse_list_from_env("RATE_LIMIT_THOUGHTS_CREATE", [ "100 per minute"]),
+    RATE_LIMIT_THOUGHTS_BULK = parse_list_from_env("RATE_LIMIT_THOUGHTS_BULK", [ "10 per hour"]),
     RATE_LIMIT_THOUGHTS_READ = parse_list_from_env("RATE_LIMIT_THOUGHTS_READ", [ "30 per minute"]),
     RATE_LIMIT_THOUGHTS_UPDATE = parse_list_from_env("RATE_LIMIT_THOUGHTS_UPDATE", [ "30 per minute"]),
     RATE_LIMIT_THOUGHTS_DELETE = parse_list_from_env("RATE_LIMIT_THOUGHTS_DELETE", [ "30 per minute"]),
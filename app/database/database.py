@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 import os
@@ -13,6 +13,30 @@ engine = create_engine(DATABASE_URL)
 
 async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=False)
 
+
+# pgvector adapters: numpy arrays bind as binary `vector` parameters and vector
+# columns read back as numpy arrays, with no text formatting or parsing either way
+@event.listens_for(engine, "connect")
+def _register_vector(dbapi_connection, connection_record):
+    if engine.dialect.driver == "psycopg2":
+        from pgvector.psycopg2 import register_vector
+    else:
+        from pgvector.psycopg import register_vector
+    register_vector(dbapi_connection)
+
+
+# Only psycopg: pgvector's asyncpg codec is binary while the ORM Vector type
+# binds text, so every ORM vector write would fail under asyncpg
+if async_engine.dialect.driver != "psycopg":
+    raise RuntimeError(f"ASYNC_DATABASE_URL must use postgresql+psycopg, got {async_engine.dialect.driver}")
+
+
+@event.listens_for(async_engine.sync_engine, "connect")
+def _register_vector_async(dbapi_connection, connection_record):
+    from pgvector.psycopg import register_vector_async
+    dbapi_connection.run_async(register_vector_async)
+
+
 AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
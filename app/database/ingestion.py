@@ -0,0 +1,114 @@
+"""
+Durable Postgres-table queue for asynchronous thought ingestion.
+
+Jobs are claimed with `FOR UPDATE SKIP LOCKED`, so any number of workers can
+poll the table without blocking each other. A claimed job is leased: if a
+worker dies mid-job, the lease expires and the job is requeued.
+"""
+
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import IngestionJob
+
+
+async def enqueue_ingestion_job(db: AsyncSession, thought_id, user_id, payload: dict, max_attempts: int = 3) -> IngestionJob:
+    job = IngestionJob(thought_id=thought_id, user_id=user_id, payload=payload, max_attempts=max_attempts)
+    db.add(job)
+    return job
+
+
+async def claim_ingestion_job(db: AsyncSession) -> Optional[dict]:
+    sql = text("""
+        UPDATE ingestion_jobs
+        SET status = 'running', attempts = attempts + 1, locked_at = now(), updated_at = now()
+        WHERE id = (
+            SELECT id FROM ingestion_jobs
+            WHERE status = 'queued' AND run_after <= now()
+            ORDER BY run_after
+            FOR UPDATE SKIP LOCKED
+            LIMIT 1
+        )
+        RETURNING id, thought_id, user_id, payload, attempts, max_attempts
+    """)
+    result = await db.execute(sql)
+    row = result.mappings().first()
+    if row is None:
+        await db.commit()
+        return None
+    await db.execute(
+        text("UPDATE thoughts SET status = 'processing' WHERE id = :thought_id"),
+        {"thought_id": row["thought_id"]},
+    )
+    await db.commit()
+    return dict(row)
+
+
+async def complete_ingestion_job(db: AsyncSession, job_id) -> None:
+    await db.execute(
+        text("UPDATE ingestion_jobs SET status = 'done', locked_at = NULL, updated_at = now() WHERE id = :id"),
+        {"id": job_id},
+    )
+    await db.commit()
+
+
+async def fail_ingestion_job(db: AsyncSession, job: dict, error: str, retry_delay_seconds: float) -> str:
+    """Requeue the job with a backoff, or mark it (and its thought) failed once attempts run out."""
+    if job["attempts"] < job["max_attempts"]:
+        status = "queued"
+        await db.execute(
+            text("""
+                UPDATE ingestion_jobs
+                SET status = 'queued', last_error = :error, locked_at = NULL, updated_at = now(),
+                    run_after = now() + make_interval(secs => :delay)
+                WHERE id = :id
+            """),
+            {"id": job["id"], "error": error, "delay": retry_delay_seconds * job["attempts"]},
+        )
+        await db.execute(text("UPDATE thoughts SET status = 'pending' WHERE id = :thought_id"), {"thought_id": job["thought_id"]})
+    else:
+        status = "failed"
+        await db.execute(
+            text("UPDATE ingestion_jobs SET status = 'failed', last_error = :error, locked_at = NULL, updated_at = now() WHERE id = :id"),
+            {"id": job["id"], "error": error},
+        )
+        await db.execute(text("UPDATE thoughts SET status = 'failed' WHERE id = :thought_id"), {"thought_id": job["thought_id"]})
+    await db.commit()
+    return status
+
+
+async def requeue_expired_ingestion_jobs(db: AsyncSession, lease_seconds: float) -> int:
+    """
+    Requeue running jobs whose lease expired, e.g. because the worker crashed, and
+    fail the ones out of attempts so a job that kills its worker isn't retried forever.
+    """
+    result = await db.execute(
+        text("""
+            UPDATE ingestion_jobs
+            SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END,
+                locked_at = NULL, updated_at = now(), last_error = 'lease expired'
+            WHERE status = 'running' AND locked_at < now() - make_interval(secs => :lease)
+            RETURNING thought_id, status
+        """),
+        {"lease": lease_seconds},
+    )
+    rows = result.all()
+    for status, thought_status in (("queued", "pending"), ("failed", "failed")):
+        thought_ids = [row.thought_id for row in rows if row.status == status]
+        if thought_ids:
+            await db.execute(
+                text("UPDATE thoughts SET status = :status WHERE id = ANY(:thought_ids)"),
+                {"status": thought_status, "thought_ids": thought_ids},
+            )
+    await db.commit()
+    return len(rows)
+
+
+async def get_ingestion_error(db: AsyncSession, thought_id) -> Optional[str]:
+    result = await db.execute(
+        text("SELECT last_error FROM ingestion_jobs WHERE thought_id = :thought_id ORDER BY created_at DESC LIMIT 1"),
+        {"thought_id": thought_id},
+    )
+    return result.scalar_one_or_none()
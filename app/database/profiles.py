@@ -0,0 +1,92 @@
+"""
+Per-user interest vector for /articles/discover, maintained incrementally.
+
+user_profiles keeps the running sum and count of a user's thought embeddings.
+Every thought write applies its delta in the same transaction, so discover reads
+one row instead of every embedding. Float sums drift slowly over many updates;
+app.jobs.reconcile_profiles recomputes them from the thoughts, and the resize and
+re-embed jobs run it once thought vectors change. Until then a write to a
+profile of the old width recomputes that one profile instead.
+"""
+
+from typing import Iterable, Optional
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.vector_search import to_vector_param
+
+
+async def apply_profile_delta(db: AsyncSession, user_id, added: Iterable = (), removed: Iterable = ()) -> None:
+    """
+    Add the `added` embeddings to the user's profile and subtract the `removed` ones. Does not commit.
+    Callers must flush their thought changes first: the fallback recomputes the
+    profile from the thoughts table as this transaction sees it.
+    """
+    added = [np.asarray(e, dtype=np.float32) for e in added if e is not None]
+    removed = [np.asarray(e, dtype=np.float32) for e in removed if e is not None]
+    if not added and not removed:
+        return
+    delta = sum(added, start=np.float32(0)) - sum(removed, start=np.float32(0))
+    # Only a profile of the same width takes the delta, one summed before an
+    # embedding resize would fail the whole write with "different vector dimensions"
+    result = await db.execute(
+        text("""
+            UPDATE user_profiles SET
+                embedding_sum = COALESCE(embedding_sum + CAST(:delta AS vector), CAST(:delta AS vector)),
+                thought_count = thought_count + :count,
+                version = version + 1,
+                updated_at = now()
+            WHERE user_id = :user_id AND (embedding_sum IS NULL OR vector_dims(embedding_sum) = :dimensions)
+            RETURNING thought_count
+        """),
+        {"user_id": user_id, "delta": to_vector_param(delta), "count": len(added) - len(removed), "dimensions": len(delta)},
+    )
+    row = result.first()
+    # No profile yet, a stale width, or a removal the profile never saw: recompute it
+    if row is None or row.thought_count < 0:
+        await recompute_user_profile(db, user_id)
+
+
+async def get_user_vector(db: AsyncSession, user_id) -> Optional[tuple[np.ndarray, int]]:
+    """Mean of the user's thought embeddings and the profile version, None without embedded thoughts."""
+    result = await db.execute(
+        text("SELECT embedding_sum, thought_count, version FROM user_profiles WHERE user_id = :user_id"),
+        {"user_id": user_id},
+    )
+    row = result.first()
+    if row is None or row.embedding_sum is None or row.thought_count <= 0:
+        return None
+    return np.asarray(row.embedding_sum, dtype=np.float32) / row.thought_count, row.version
+
+
+async def recompute_user_profile(db: AsyncSession, user_id) -> None:
+    """Recompute one profile from the thoughts table. Does not commit."""
+    await db.execute(
+        text("INSERT INTO user_profiles (user_id) VALUES (:user_id) ON CONFLICT (user_id) DO NOTHING"),
+        {"user_id": user_id},
+    )
+    # Writers lock the profile row after changing thoughts, so once we hold it the
+    # sum below sees every committed change and later ones apply on top of it
+    await db.execute(text("SELECT 1 FROM user_profiles WHERE user_id = :user_id FOR UPDATE"), {"user_id": user_id})
+    await db.execute(
+        text("""
+            UPDATE user_profiles p
+            SET embedding_sum = s.embedding_sum, thought_count = s.thought_count,
+                version = p.version + 1, updated_at = now()
+            FROM (
+                SELECT sum(embedding) AS embedding_sum, count(*) AS thought_count
+                FROM thoughts
+                WHERE user_id = :user_id AND embedding IS NOT NULL
+            ) s
+            WHERE p.user_id = :user_id
+        """),
+        {"user_id": user_id},
+    )
+
+
+async def rebuild_user_profile(db: AsyncSession, user_id) -> None:
+    """Recompute one profile from the thoughts table and commit."""
+    await recompute_user_profile(db, user_id)
+    await db.commit()
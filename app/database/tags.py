@@ -1,21 +1,54 @@
-from sqlalchemy.orm import Session
-from app.models.models import Thought, Tag
+import uuid
+from sqlalchemy import select, insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from app.models.models import Thought, Tag, ThoughtTag
 from slugify import slugify
 
 
-def assign_tags_to_thought(db: Session, user_id: str, thought_id: str, tag_names: list[str]):
-    thought = db.query(Thought).filter_by(id=thought_id, user_id=user_id).first()
+async def assign_tags_to_thought(db: AsyncSession, user_id: str, thought_id: str, tag_names: list[str]):
+    result = await db.execute(
+        select(Thought).options(selectinload(Thought.tags)).where(Thought.id == thought_id, Thought.user_id == user_id)
+    )
+    thought = result.scalar_one_or_none()
     if not thought:
         raise ValueError(f"Thought with id {thought_id} not found")
     
+    result = await db.execute(select(Tag).where(Tag.user_id == user_id, Tag.name.in_(tag_names)))
+    existing = {tag.name: tag for tag in result.scalars().all()}
+    
     tags = []
     for name in tag_names:
-        tag = db.query(Tag).filter_by(name=name, user_id=user_id).first()
+        tag = existing.get(name)
         if not tag:
             tag = Tag(name=name, slug=slugify(name), user_id=user_id)
             db.add(tag)
-            db.flush()
-        tags.append(tag)
+            existing[name] = tag
+        if tag not in tags:
+            tags.append(tag)
+    await db.flush()
 
     thought.tags = tags
-    db.commit()
+    await db.commit()
+
+
+async def bulk_assign_tags(db: AsyncSession, user_id: str, tags_by_thought: dict[str, list[str]]):
+    """Tag many new thoughts with one tag upsert and one thought_tags insert. Does not commit."""
+    names = sorted({name for tag_names in tags_by_thought.values() for name in tag_names})
+    if not names:
+        return
+    
+    await db.execute(
+        pg_insert(Tag).on_conflict_do_nothing(constraint="uix_user_id_name"),
+        [{"id": uuid.uuid4(), "name": name, "slug": slugify(name), "user_id": user_id} for name in names],
+    )
+    result = await db.execute(select(Tag.name, Tag.id).where(Tag.user_id == user_id, Tag.name.in_(names)))
+    tag_ids = dict(result.all())
+    
+    rows = []
+    for thought_id, tag_names in tags_by_thought.items():
+        for name in dict.fromkeys(tag_names):
+            rows.append({"thought_id": thought_id, "tag_id": tag_ids[name]})
+    if rows:
+        await db.execute(insert(ThoughtTag), rows)
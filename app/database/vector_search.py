@@ -0,0 +1,257 @@
+"""
+Raw SQL helpers for vector search over thoughts and external articles.
+
+VECTOR_STORAGE selects which column the similarity queries read:
+  - "vector":  the full precision `embedding` column
+  - "halfvec": the `embedding_half` mirror (2 bytes per dimension), a stored
+               generated column kept in sync by Postgres
+
+Article search runs in two stages: an HNSW index over the binary quantized
+vectors (1 bit per dimension, Hamming distance) fetches ARTICLE_RERANK_FACTOR
+times the requested rows, and only those candidates are reranked with the
+exact full precision inner product, whatever VECTOR_STORAGE is set to.
+Discover pages through the HNSW index on the VECTOR_STORAGE column directly:
+a coarse stage would have to refetch every row already served on each page.
+
+A plain HNSW scan returns at most hnsw.ef_search rows (capped at 1000). Queries
+that need more turn on `hnsw.iterative_scan`, which keeps walking the graph
+until the LIMIT is met or hnsw.max_scan_tuples tuples have been visited.
+
+Thought searches are always filtered to one user, which a global ANN index
+handles badly: the graph walk finds the nearest thoughts of all users and the
+filter then drops most of them. Users with up to THOUGHT_EXACT_SEARCH_MAX_ROWS
+thoughts get an exact scan over their rows (via the user_id index), larger
+ones get an HNSW scan with `hnsw.iterative_scan`, which keeps walking the graph
+until enough rows pass the filter.
+"""
+
+import os
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import LRUCache
+from app.core.config import EMBEDDING_DIMENSIONS
+
+VECTOR_STORAGE = os.getenv("VECTOR_STORAGE", "vector")
+if VECTOR_STORAGE not in ("vector", "halfvec"):
+    raise RuntimeError(f"Unsupported VECTOR_STORAGE: {VECTOR_STORAGE}")
+# VECTOR_STORAGE -> (index name suffix, DDL) of the HNSW index on thoughts and external_articles.
+# Migrations build the "vector" ones, app.jobs.vector_storage_indexes switches.
+VECTOR_STORAGE_INDEXES = {
+    "vector": ("embedding_idx", "USING hnsw (embedding vector_ip_ops) WITH (m = 16, ef_construction = 64)"),
+    "halfvec": ("embedding_half_idx", "USING hnsw (embedding_half halfvec_ip_ops)"),
+}
+# 0 skips the binary stage and searches the HNSW index on the full vectors directly
+ARTICLE_RERANK_FACTOR = int(os.getenv("ARTICLE_RERANK_FACTOR", "10"))
+
+# hnsw.ef_search per endpoint: the size of the candidate list kept while walking the
+# graph, higher is better recall and slower. pgvector's default is 40.
+HNSW_EF_SEARCH = {
+    "article_search": int(os.getenv("HNSW_EF_SEARCH_ARTICLE_SEARCH", "100")),
+    "article_discover": int(os.getenv("HNSW_EF_SEARCH_ARTICLE_DISCOVER", "100")),
+    "article_passages": int(os.getenv("HNSW_EF_SEARCH_ARTICLE_PASSAGES", "100")),
+    "thought_search": int(os.getenv("HNSW_EF_SEARCH_THOUGHT_SEARCH", "40")),
+}
+# pgvector's upper bound for hnsw.ef_search
+HNSW_EF_SEARCH_MAX = 1000
+# Tuples an iterative scan may visit, raised per query to cover the rows it needs. pgvector's default is 20000.
+HNSW_MAX_SCAN_TUPLES = int(os.getenv("HNSW_MAX_SCAN_TUPLES", "20000"))
+
+# Deepest discover position served, bounds the graph walk of a page
+DISCOVER_MAX_DEPTH = int(os.getenv("DISCOVER_MAX_DEPTH", "10000"))
+
+# Above this many embedded thoughts a user's searches go through the HNSW index
+THOUGHT_EXACT_SEARCH_MAX_ROWS = int(os.getenv("THOUGHT_EXACT_SEARCH_MAX_ROWS", "5000"))
+# Row counts only pick the strategy, a few minutes of staleness is fine
+THOUGHT_COUNT_CACHE_TTL_SECONDS = float(os.getenv("THOUGHT_COUNT_CACHE_TTL_SECONDS", "300"))
+thought_counts = LRUCache("thought_counts", max_size=10000, ttl_seconds=THOUGHT_COUNT_CACHE_TTL_SECONDS)
+
+
+def distance_sql(param: str = "embedding", storage: str = VECTOR_STORAGE) -> str:
+    """Negative inner product between the stored vectors and the bound `param`."""
+    if storage == "halfvec":
+        return f"embedding_half <#> (:{param})::halfvec({EMBEDDING_DIMENSIONS})"
+    return f"embedding <#> (:{param})::vector"
+
+
+def binary_distance_sql(param: str = "embedding") -> str:
+    """Hamming distance between the binary quantized vectors, matching the bit index expression."""
+    return (
+        f"binary_quantize(embedding)::bit({EMBEDDING_DIMENSIONS}) "
+        f"<~> binary_quantize((:{param})::vector)::bit({EMBEDDING_DIMENSIONS})"
+    )
+
+
+async def set_iterative_scan(db: AsyncSession, order: str, min_results: int = 0) -> None:
+    """SET LOCAL hnsw.iterative_scan to `order` and allow enough visited tuples for `min_results` rows."""
+    await db.execute(text(f"SET LOCAL hnsw.iterative_scan = {order}"))
+    max_scan_tuples = max(HNSW_MAX_SCAN_TUPLES, min_results)
+    await db.execute(text(f"SET LOCAL hnsw.max_scan_tuples = {int(max_scan_tuples)}"))
+
+
+async def set_ef_search(db: AsyncSession, endpoint: str, min_results: int = 0) -> None:
+    """
+    SET LOCAL hnsw.ef_search for the rest of the current transaction. An index scan
+    returns at most ef_search rows, so it is raised to cover `min_results`, and past
+    HNSW_EF_SEARCH_MAX the scan turns iterative. relaxed_order is enough there:
+    those callers all re-sort the rows they fetch.
+    """
+    ef_search = min(max(HNSW_EF_SEARCH[endpoint], min_results), HNSW_EF_SEARCH_MAX)
+    await db.execute(text(f"SET LOCAL hnsw.ef_search = {int(ef_search)}"))
+    if min_results > HNSW_EF_SEARCH_MAX:
+        await set_iterative_scan(db, "relaxed_order", min_results)
+
+
+async def missing_vector_indexes(db: AsyncSession) -> list[str]:
+    """HNSW indexes VECTOR_STORAGE searches read that don't exist, every search on them is a sequential scan."""
+    suffix, _ = VECTOR_STORAGE_INDEXES[VECTOR_STORAGE]
+    expected = [f"{table}_{suffix}" for table in ("thoughts", "external_articles")]
+    result = await db.execute(text("SELECT indexname FROM pg_indexes WHERE indexname = ANY(:names)"), {"names": expected})
+    existing = set(result.scalars().all())
+    return [name for name in expected if name not in existing]
+
+
+def to_vector_param(vec) -> np.ndarray:
+    """Bound as a binary float32 `vector` parameter by the pgvector adapters registered on the engines."""
+    return np.asarray(vec, dtype=np.float32)
+
+
+def _article_source(columns: str) -> tuple[str, str]:
+    """FROM clause and distance expression for article search."""
+    if ARTICLE_RERANK_FACTOR > 0:
+        source = f"""(
+            SELECT {columns}, embedding
+            FROM external_articles
+            ORDER BY {binary_distance_sql()}
+            LIMIT :candidates
+        ) candidates"""
+        return source, distance_sql(storage="vector")
+    return "external_articles", distance_sql()
+
+
+async def search_articles(db: AsyncSession, query_embedding, top_k: int):
+    columns = "id, title, url, authors"
+    source, distance = _article_source(columns)
+    sql = text(f"""
+        SELECT {columns}, {distance} AS distance
+        FROM {source}
+        ORDER BY distance
+        LIMIT :top_k
+    """)
+    candidates = top_k * max(ARTICLE_RERANK_FACTOR, 1)
+    await set_ef_search(db, "article_search", candidates)
+    result = await db.execute(sql, {"embedding": to_vector_param(query_embedding), "top_k": top_k, "candidates": candidates})
+    return result.all()
+
+
+async def discover_articles(db: AsyncSession, user_vector, limit: int, offset: int = 0, after: Optional[tuple] = None, served: int = 0):
+    """
+    A page of the articles nearest to `user_vector`, ordered by (distance, id).
+    `after` is the (distance, id) of the last row already served and `served` how many
+    rows came before it.
+    """
+    columns = "id, title, text, authors, top_image_url, tags, url, published_at"
+    distance = distance_sql()
+    keyset = f"WHERE ({distance}, id) > (:after_distance, CAST(:after_id AS uuid))" if after else ""
+    sql = text(f"""
+        SELECT {columns}, {distance} AS distance
+        FROM external_articles
+        {keyset}
+        ORDER BY distance, id
+        LIMIT :limit
+        OFFSET :offset
+    """)
+    # HNSW can't seek to the cursor: the graph walk still passes the rows already
+    # served, but the filter drops them before the heap is read. strict_order keeps
+    # the index order exact, which the keyset comparison relies on.
+    await set_ef_search(db, "article_discover", limit if after else offset + limit)
+    await set_iterative_scan(db, "strict_order", min(max(offset, served), DISCOVER_MAX_DEPTH) + limit)
+    params = {
+        "embedding": to_vector_param(user_vector),
+        "limit": limit,
+        "offset": 0 if after else offset,
+        "after_distance": after[0] if after else None,
+        "after_id": after[1] if after else None,
+    }
+    result = await db.execute(sql, params)
+    return result.all()
+
+
+async def search_article_passages(db: AsyncSession, query_embedding, top_k: int):
+    """Nearest chunks first, then the best chunk of each article."""
+    sql = text(f"""
+        WITH nearest AS (
+            SELECT article_id, chunk_index, text, {distance_sql(storage="vector")} AS distance
+            FROM article_chunks
+            ORDER BY {distance_sql(storage="vector")}
+            LIMIT :candidates
+        ), best AS (
+            SELECT DISTINCT ON (article_id) article_id, chunk_index, text, distance
+            FROM nearest
+            ORDER BY article_id, distance
+        )
+        SELECT a.id, a.title, a.url, a.authors, best.distance, best.chunk_index, best.text
+        FROM best
+        JOIN external_articles a ON a.id = best.article_id
+        ORDER BY best.distance
+        LIMIT :top_k
+    """)
+    params = {
+        "embedding": to_vector_param(query_embedding),
+        "top_k": top_k,
+        "candidates": top_k * max(ARTICLE_RERANK_FACTOR, 1),
+    }
+    await set_ef_search(db, "article_passages", params["candidates"])
+    result = await db.execute(sql, params)
+    return result.all()
+
+
+async def count_user_thoughts(db: AsyncSession, user_id) -> int:
+    count = thought_counts.get(str(user_id))
+    if count is None:
+        result = await db.execute(
+            text("SELECT count(*) FROM thoughts WHERE user_id = :user_id AND embedding IS NOT NULL"),
+            {"user_id": user_id},
+        )
+        count = result.scalar_one()
+        thought_counts.set(str(user_id), count)
+    return count
+
+
+async def search_user_thoughts(db: AsyncSession, query_embedding, user_id, top_k: int):
+    """Nearest thoughts of one user: rows of (id, title, full_content, distance, created_at)."""
+    column = "embedding_half" if VECTOR_STORAGE == "halfvec" else "embedding"
+    if await count_user_thoughts(db, user_id) <= THOUGHT_EXACT_SEARCH_MAX_ROWS:
+        # MATERIALIZED keeps the planner from pushing the ORDER BY into the global index
+        sql = text(f"""
+            WITH user_thoughts AS MATERIALIZED (
+                SELECT id, title, full_content, created_at, {column}
+                FROM thoughts
+                WHERE user_id = :user_id AND embedding IS NOT NULL
+            )
+            SELECT id, title, full_content, {distance_sql()} AS distance, created_at
+            FROM user_thoughts
+            ORDER BY distance, created_at DESC
+            LIMIT :top_k
+        """)
+    else:
+        await set_ef_search(db, "thought_search", top_k)
+        # relaxed_order returns rows slightly out of order, the outer query sorts them exactly
+        await set_iterative_scan(db, "relaxed_order", top_k)
+        sql = text(f"""
+            WITH nearest AS MATERIALIZED (
+                SELECT id, title, full_content, {distance_sql()} AS distance, created_at
+                FROM thoughts
+                WHERE user_id = :user_id AND embedding IS NOT NULL
+                ORDER BY {distance_sql()}
+                LIMIT :top_k
+            )
+            SELECT id, title, full_content, distance, created_at
+            FROM nearest
+            ORDER BY distance, created_at DESC
+        """)
+    result = await db.execute(sql, {"embedding": to_vector_param(query_embedding), "user_id": user_id, "top_k": top_k})
+    return result.all()
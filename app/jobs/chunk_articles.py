@@ -0,0 +1,63 @@
+"""
+Backfill passage chunks for external articles embedded before article_chunks existed.
+
+Each article without chunks is split, its chunks embedded, and its document
+vector replaced with the pooled chunk vectors.
+
+Usage:
+    python -m app.jobs.chunk_articles --batch-size 50 --concurrency 4
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import exists, select, update
+
+from app.core.logging import logger
+from app.database.database import AsyncSessionLocal
+from app.llm_utils.embeddings.documents import embed_document
+from app.models.models import ArticleChunk, ExternalAritcle
+
+
+async def chunk_batch(batch_size: int, concurrency: int) -> int:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(ExternalAritcle.id, ExternalAritcle.text)
+            .where(~exists().where(ArticleChunk.article_id == ExternalAritcle.id))
+            .order_by(ExternalAritcle.id)
+            .limit(batch_size)
+        )
+        rows = result.all()
+        if not rows:
+            return 0
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def embed(text):
+            async with semaphore:
+                return await embed_document(text)
+
+        documents = await asyncio.gather(*(embed(row.text) for row in rows))
+        for row, (chunks, embedding) in zip(rows, documents):
+            db.add_all(ArticleChunk(article_id=row.id, **chunk) for chunk in chunks)
+            await db.execute(update(ExternalAritcle).where(ExternalAritcle.id == row.id).values(embedding=embedding))
+        await db.commit()
+        return len(rows)
+
+
+async def main(batch_size: int, concurrency: int) -> None:
+    total = 0
+    start = time.perf_counter()
+    while count := await chunk_batch(batch_size, concurrency):
+        total += count
+        logger.info("chunk_articles_progress", articles=total, articles_per_sec=round(total / (time.perf_counter() - start), 1))
+    logger.info("chunk_articles_done", articles=total)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill passage chunks for external articles")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size, args.concurrency))
@@ -0,0 +1,118 @@
+"""
+Thought ingestion worker.
+
+Claims jobs queued by /thoughts/ingest and runs the enrichment pipeline
+(vision, transcription, embedding, tagging) outside of the API process.
+
+Usage:
+    python -m app.jobs.ingestion_worker --concurrency 4
+"""
+
+import argparse
+import asyncio
+import os
+
+from sqlalchemy import select
+
+from app.core.logging import logger
+from app.database.database import AsyncSessionLocal
+from app.database.ingestion import (
+    claim_ingestion_job,
+    complete_ingestion_job,
+    fail_ingestion_job,
+    requeue_expired_ingestion_jobs,
+)
+from app.database.profiles import apply_profile_delta
+from app.database.tags import assign_tags_to_thought
+from app.llm_utils.enrichment import enrich_thought
+from app.models.models import Thought
+from app.utils.aws_utils import get_file_from_s3
+
+INGESTION_WORKER_CONCURRENCY = int(os.getenv("INGESTION_WORKER_CONCURRENCY", "4"))
+INGESTION_POLL_INTERVAL = float(os.getenv("INGESTION_POLL_INTERVAL", "1"))
+INGESTION_LEASE_SECONDS = float(os.getenv("INGESTION_LEASE_SECONDS", "600"))
+INGESTION_RETRY_DELAY_SECONDS = float(os.getenv("INGESTION_RETRY_DELAY_SECONDS", "30"))
+
+
+async def process_job(job: dict) -> None:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Thought).where(Thought.id == job["thought_id"]))
+        thought = result.scalar_one_or_none()
+        if thought is None:
+            # Deleted while queued
+            await complete_ingestion_job(db, job["id"])
+            return
+
+        payload = job["payload"]
+        file_path = payload["file_path"]
+        image_bytes, audio_bytes = await asyncio.gather(
+            get_file_from_s3(f"{file_path}/image.png") if thought.image_url else asyncio.sleep(0),
+            get_file_from_s3(f"{file_path}/audio.mp3") if thought.audio_url else asyncio.sleep(0),
+        )
+        enrichment = await enrich_thought(
+            db,
+            job["user_id"],
+            file_path,
+            text=payload.get("text"),
+            image_bytes=image_bytes,
+            audio_bytes=audio_bytes,
+            upload=False,
+        )
+
+        # A retried job may replace an embedding that is already counted
+        previous_embedding = thought.embedding
+        thought.title = enrichment["title"]
+        thought.full_content = enrichment["full_content"]
+        thought.embedding = enrichment["embedding"]
+        thought.status = "ready"
+        await db.flush()
+        await apply_profile_delta(db, job["user_id"], added=[thought.embedding], removed=[previous_embedding])
+        await assign_tags_to_thought(db, job["user_id"], thought.id, enrichment["tags"])
+        await complete_ingestion_job(db, job["id"])
+
+
+async def worker_loop(worker_id: int, poll_interval: float) -> None:
+    while True:
+        async with AsyncSessionLocal() as db:
+            job = await claim_ingestion_job(db)
+        if job is None:
+            await asyncio.sleep(poll_interval)
+            continue
+
+        logger.info("ingestion_job_claimed", worker_id=worker_id, job_id=str(job["id"]), thought_id=str(job["thought_id"]), attempts=job["attempts"])
+        try:
+            await process_job(job)
+            logger.info("ingestion_job_done", worker_id=worker_id, job_id=str(job["id"]))
+        except Exception as e:
+            async with AsyncSessionLocal() as db:
+                status = await fail_ingestion_job(db, job, str(e), INGESTION_RETRY_DELAY_SECONDS)
+            logger.error("ingestion_job_error", worker_id=worker_id, job_id=str(job["id"]), status=status, error=str(e))
+
+
+async def reaper_loop(lease_seconds: float) -> None:
+    while True:
+        async with AsyncSessionLocal() as db:
+            requeued = await requeue_expired_ingestion_jobs(db, lease_seconds)
+        if requeued:
+            logger.warning("ingestion_jobs_requeued", count=requeued)
+        await asyncio.sleep(lease_seconds / 2)
+
+
+async def main(concurrency: int, poll_interval: float, lease_seconds: float) -> None:
+    logger.info("ingestion_worker_startup", concurrency=concurrency)
+    await asyncio.gather(
+        reaper_loop(lease_seconds),
+        *[worker_loop(i, poll_interval) for i in range(concurrency)],
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the thought ingestion worker")
+    parser.add_argument("--concurrency", type=int, default=INGESTION_WORKER_CONCURRENCY)
+    parser.add_argument("--poll-interval", type=float, default=INGESTION_POLL_INTERVAL)
+    parser.add_argument("--lease-seconds", type=float, default=INGESTION_LEASE_SECONDS)
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args.concurrency, args.poll_interval, args.lease_seconds))
+    except KeyboardInterrupt:
+        logger.info("ingestion_worker_shutdown")
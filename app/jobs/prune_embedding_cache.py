@@ -0,0 +1,50 @@
+"""
+Delete embedding_cache rows that haven't been read for EMBEDDING_CACHE_TTL_DAYS.
+
+Reads already ignore them, this only reclaims the space. Deletes in small
+batches so each transaction stays short. Run it daily, e.g. from cron.
+
+Usage:
+    python -m app.jobs.prune_embedding_cache
+    python -m app.jobs.prune_embedding_cache --ttl-days 30 --batch-size 5000
+"""
+
+import argparse
+import asyncio
+
+from sqlalchemy import text
+
+from app.core.logging import logger
+from app.database.database import AsyncSessionLocal
+from app.llm_utils.embeddings.cache import EMBEDDING_CACHE_TTL_DAYS
+
+
+async def main(ttl_days: int = EMBEDDING_CACHE_TTL_DAYS, batch_size: int = 1000) -> int:
+    total = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                text("""
+                    DELETE FROM embedding_cache
+                    WHERE key IN (
+                        SELECT key FROM embedding_cache
+                        WHERE last_used_at < now() - make_interval(days => :ttl_days)
+                        LIMIT :batch_size
+                    )
+                """),
+                {"ttl_days": ttl_days, "batch_size": batch_size},
+            )
+            await db.commit()
+        total += result.rowcount
+        if result.rowcount < batch_size:
+            break
+    logger.info("prune_embedding_cache_done", rows=total, ttl_days=ttl_days)
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Delete expired embedding cache rows")
+    parser.add_argument("--ttl-days", type=int, default=EMBEDDING_CACHE_TTL_DAYS)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.ttl_days, args.batch_size))
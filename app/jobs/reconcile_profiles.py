@@ -0,0 +1,54 @@
+"""
+Recompute user_profiles from the thoughts table.
+
+Fixes floating point drift in the running sums and any delta that was missed,
+e.g. writes made outside the API. app.jobs.resize_embeddings and app.jobs.reembed
+run it after changing the thought vectors.
+
+Usage:
+    python -m app.jobs.reconcile_profiles
+    python -m app.jobs.reconcile_profiles --user-id <uuid>
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import select
+
+from app.core.logging import logger
+from app.database.database import AsyncSessionLocal
+from app.database.profiles import rebuild_user_profile
+from app.models.models import User
+
+
+async def main(user_id: str = None, batch_size: int = 500) -> None:
+    total = 0
+    start = time.perf_counter()
+    cursor = None
+    while True:
+        async with AsyncSessionLocal() as db:
+            if user_id:
+                user_ids = [user_id] if cursor is None else []
+            else:
+                query = select(User.id).order_by(User.id).limit(batch_size)
+                if cursor is not None:
+                    query = query.where(User.id > cursor)
+                user_ids = (await db.execute(query)).scalars().all()
+            if not user_ids:
+                break
+            # One short transaction per user keeps profile row locks brief
+            for profile_user_id in user_ids:
+                await rebuild_user_profile(db, profile_user_id)
+        cursor = user_ids[-1]
+        total += len(user_ids)
+        logger.info("reconcile_profiles_progress", users=total, users_per_sec=round(total / (time.perf_counter() - start), 1))
+    logger.info("reconcile_profiles_done", users=total)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute user interest profiles from thoughts")
+    parser.add_argument("--user-id", default=None)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.user_id, args.batch_size))
@@ -0,0 +1,214 @@
+"""
+Resumable re-embedding of a table's vectors, e.g. after an embedding model change.
+
+Walks the table in primary key order (keyset pagination), embeds `concurrency`
+pages at a time and writes each page back with a single
+UPDATE ... FROM (VALUES ...). The last id of every completed wave is stored in
+job_checkpoints, so a crashed or interrupted run resumes where it stopped. The
+checkpoint is named after the embedding model and deleted once the scan
+completes, so the next run, or a run with another model, starts from the first row.
+
+Usage:
+    python -m app.jobs.reembed --table thoughts
+    python -m app.jobs.reembed --table external_articles --batch-size 200 --concurrency 8
+    python -m app.jobs.reembed --table thoughts --dry-run
+
+--dry-run embeds with the fake provider and rolls every write back: it measures
+the read/embed/write pipeline without calling the API or changing any data.
+
+Rows inserted during a run are embedded by the app itself, with whatever
+provider it is configured with, so switch the deployment before re-embedding.
+Re-embedding thoughts.embedding rebuilds user_profiles once the scan completes.
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Optional
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.config import EMBEDDING_DIMENSIONS
+from app.core.logging import logger
+from app.database.database import AsyncSessionLocal
+from app.database.vector_search import to_vector_param
+from app.jobs.reconcile_profiles import main as reconcile_profiles
+from app.llm_utils.embeddings.cache import embedding_cache
+from app.llm_utils.embeddings.documents import ARTICLE_CHUNK_OVERLAP, ARTICLE_CHUNK_TOKENS, pool_embeddings
+from app.llm_utils.embeddings.embeddings import embed_texts
+from app.llm_utils.embeddings.providers import FakeEmbeddingProvider, get_embedding_provider, set_embedding_provider
+from app.llm_utils.tokens import chunk_text
+from app.models.models import JobCheckpoint
+
+# table -> text column that is embedded
+TABLES = {
+    "thoughts": "full_content",
+    "external_articles": "text",
+    "article_chunks": "text",
+}
+
+
+async def embed_rows(table: str, texts: list[str], dimensions: int) -> list:
+    if table == "external_articles":
+        # Article vectors are pooled from their chunks. All chunks of the page go
+        # through one embed_texts call, which the provider splits into bounded requests
+        documents = [chunk_text(text, ARTICLE_CHUNK_TOKENS, ARTICLE_CHUNK_OVERLAP) or [(text, 1)] for text in texts]
+        embeddings = await embed_texts([chunk for chunks in documents for chunk, _ in chunks], dimensions=dimensions)
+        pooled, start = [], 0
+        for chunks in documents:
+            pooled.append(pool_embeddings(embeddings[start:start + len(chunks)], [token_count for _, token_count in chunks]))
+            start += len(chunks)
+        return pooled
+    return await embed_texts(texts, dimensions=dimensions)
+
+
+async def load_checkpoint(name: str) -> tuple[Optional[str], int]:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(JobCheckpoint).where(JobCheckpoint.name == name))
+        checkpoint = result.scalar_one_or_none()
+    if checkpoint is None:
+        return None, 0
+    return checkpoint.cursor, checkpoint.rows_done
+
+
+async def save_checkpoint(name: str, cursor: Optional[str], rows_done: int) -> None:
+    async with AsyncSessionLocal() as db:
+        stmt = pg_insert(JobCheckpoint).values(name=name, cursor=cursor, rows_done=rows_done)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[JobCheckpoint.name],
+            set_={"cursor": stmt.excluded.cursor, "rows_done": stmt.excluded.rows_done, "updated_at": text("now()")},
+        )
+        await db.execute(stmt)
+        await db.commit()
+
+
+async def delete_checkpoint(name: str) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(JobCheckpoint).where(JobCheckpoint.name == name))
+        await db.commit()
+
+
+def checkpoint_name(table: str, column: str, dimensions: int) -> str:
+    # A checkpoint only resumes a run into the same vector space
+    return f"reembed:{table}:{column}:{get_embedding_provider().model}@{dimensions}"
+
+
+async def fetch_page(db, table: str, column: str, cursor: Optional[str], batch_size: int, only_missing: bool) -> list:
+    conditions = ["embedding IS NOT NULL"]
+    if only_missing:
+        conditions.append(f"{column} IS NULL")
+    if cursor is not None:
+        conditions.append("id > CAST(:cursor AS uuid)")
+    result = await db.execute(
+        text(f"SELECT id, {TABLES[table]} FROM {table} WHERE {' AND '.join(conditions)} ORDER BY id LIMIT :batch_size"),
+        {"cursor": cursor, "batch_size": batch_size},
+    )
+    return result.all()
+
+
+async def write_page(db, table: str, column: str, rows: list, embeddings: list) -> None:
+    values = ", ".join(f"(CAST(:id_{i} AS uuid), CAST(:embedding_{i} AS vector))" for i in range(len(rows)))
+    params = {}
+    for i, (row, embedding) in enumerate(zip(rows, embeddings)):
+        params[f"id_{i}"] = row[0]
+        params[f"embedding_{i}"] = to_vector_param(embedding)
+    await db.execute(
+        text(f"UPDATE {table} AS t SET {column} = v.embedding FROM (VALUES {values}) AS v(id, embedding) WHERE t.id = v.id"),
+        params,
+    )
+
+
+async def process_page(table: str, column: str, dimensions: int, rows: list, dry_run: bool) -> None:
+    embeddings = await embed_rows(table, [row[1] or "" for row in rows], dimensions)
+    async with AsyncSessionLocal() as db:
+        await write_page(db, table, column, rows, embeddings)
+        if dry_run:
+            await db.rollback()
+        else:
+            await db.commit()
+
+
+async def reembed(
+    table: str,
+    column: str = "embedding",
+    dimensions: Optional[int] = None,
+    batch_size: int = 500,
+    concurrency: int = 4,
+    only_missing: bool = False,
+    checkpoint: Optional[str] = None,
+    dry_run: bool = False,
+) -> int:
+    """Re-embed `table` into `column`, returns the number of rows written by this run."""
+    dimensions = dimensions or EMBEDDING_DIMENSIONS
+    if checkpoint and not dry_run:
+        cursor, total = await load_checkpoint(checkpoint)
+    else:
+        cursor, total = None, 0
+    if cursor is not None:
+        logger.info("reembed_resume", table=table, column=column, cursor=cursor, rows=total)
+
+    rows_this_run = 0
+    start = time.perf_counter()
+    while True:
+        # Pages are read in key order, then embedded and written concurrently
+        pages = []
+        async with AsyncSessionLocal() as db:
+            for _ in range(concurrency):
+                rows = await fetch_page(db, table, column, cursor, batch_size, only_missing)
+                if not rows:
+                    break
+                pages.append(rows)
+                cursor = str(rows[-1][0])
+        if not pages:
+            break
+
+        await asyncio.gather(*(process_page(table, column, dimensions, rows, dry_run) for rows in pages))
+        count = sum(len(rows) for rows in pages)
+        total += count
+        rows_this_run += count
+        # Only checkpoint once the whole wave is written, a crash mid-wave redoes at most one wave
+        if checkpoint and not dry_run:
+            await save_checkpoint(checkpoint, cursor, total)
+        logger.info("reembed_progress", table=table, column=column, rows=total, rows_per_sec=round(rows_this_run / (time.perf_counter() - start), 1), dry_run=dry_run)
+
+    # The scan is complete, a later run must not resume past the last id
+    if checkpoint and not dry_run:
+        await delete_checkpoint(checkpoint)
+    # Profile sums still hold the old vectors
+    if table == "thoughts" and column == "embedding" and not dry_run:
+        await reconcile_profiles()
+    logger.info("reembed_done", table=table, column=column, rows=rows_this_run, seconds=round(time.perf_counter() - start, 1), dry_run=dry_run)
+    return rows_this_run
+
+
+async def main(args) -> None:
+    if args.dry_run:
+        set_embedding_provider(FakeEmbeddingProvider())
+        embedding_cache.persist = False
+    checkpoint = checkpoint_name(args.table, args.column, args.dimensions or EMBEDDING_DIMENSIONS)
+    if args.reset and not args.dry_run:
+        await delete_checkpoint(checkpoint)
+    await reembed(
+        args.table,
+        column=args.column,
+        dimensions=args.dimensions,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        only_missing=args.only_missing,
+        checkpoint=checkpoint,
+        dry_run=args.dry_run,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-embed a table's vectors")
+    parser.add_argument("--table", choices=list(TABLES.keys()), required=True)
+    parser.add_argument("--column", choices=["embedding", "embedding_next"], default="embedding")
+    parser.add_argument("--dimensions", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--only-missing", action="store_true", help="skip rows that already have a vector in --column")
+    parser.add_argument("--reset", action="store_true", help="discard the checkpoint and start from the first row")
+    parser.add_argument("--dry-run", action="store_true")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,169 @@
+"""
+Online migration of thought/article embeddings to a new width.
+
+Existing rows are re-embedded in the background into an `embedding_next`
+column while the app keeps serving from `embedding`. Once the backfill is
+done, its index is built concurrently and the two columns are swapped in a
+single short transaction.
+
+`prepare` is the one step that is not online on tables with the halfvec mirror
+(thoughts, external_articles): adding `embedding_next_half` as a stored
+generated column rewrites the table under an ACCESS EXCLUSIVE lock, blocking
+all reads and writes until it finishes. Run it in a maintenance window. The
+mirror stays generated because the models and inserts rely on Postgres
+filling it; a plain column would be left empty by app writes after the swap.
+
+    # maintenance window on tables with embedding_half
+    python -m app.jobs.resize_embeddings --table thoughts --dimensions 512 prepare
+    python -m app.jobs.resize_embeddings --table thoughts --dimensions 512 backfill
+    python -m app.jobs.resize_embeddings --table thoughts --dimensions 512 swap
+    # deploy with EMBEDDING_DIMENSIONS=512, then once nothing reads the old vectors
+    python -m app.jobs.resize_embeddings --table thoughts --dimensions 512 cleanup
+
+Swapping thoughts also rebuilds user_profiles, whose sums are derived from the
+thought vectors, at the new width.
+
+Thought and article vectors are compared against each other by /articles/discover,
+so migrate all tables to the same width before switching the deployment.
+Article vectors are pooled from their chunks, so external_articles re-embeds
+the chunked text; run article_chunks in the same window, the chunk vectors
+come out of the embedding cache.
+
+Rows written between the last backfill batch and the swap are embedded by
+`swap` itself before it takes the table lock. Writes from app instances still
+configured with the old width fail after the swap, so roll the deployment
+right after it (or pause the ingestion worker around it).
+"""
+
+import argparse
+import asyncio
+
+from sqlalchemy import text
+
+from app.core.logging import logger
+from app.database.database import AsyncSessionLocal, async_engine
+from app.jobs.reconcile_profiles import main as reconcile_profiles
+from app.jobs.reembed import reembed
+
+# table -> {index name suffix: DDL for the new column}. Tables indexed for
+# VECTOR_STORAGE=halfvec have an embedding_half_idx instead of embedding_idx.
+TABLES = {
+    "thoughts": {"embedding_idx": "USING hnsw (embedding_next vector_ip_ops)"},
+    "external_articles": {
+        "embedding_idx": "USING hnsw (embedding_next vector_ip_ops)",
+        "embedding_bit_idx": "USING hnsw ((binary_quantize(embedding_next)::bit({dimensions})) bit_hamming_ops)",
+    },
+    "article_chunks": {"embedding_idx": "USING hnsw (embedding_next vector_ip_ops)"},
+}
+
+
+async def _has_column(db, table: str, column: str) -> bool:
+    result = await db.execute(
+        text("SELECT 1 FROM information_schema.columns WHERE table_name = :table AND column_name = :column"),
+        {"table": table, "column": column},
+    )
+    return result.first() is not None
+
+
+async def _has_index(db, name: str) -> bool:
+    result = await db.execute(text("SELECT 1 FROM pg_indexes WHERE indexname = :name"), {"name": name})
+    return result.first() is not None
+
+
+async def prepare(table: str, dimensions: int) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS embedding_next vector({dimensions})"))
+        if await _has_column(db, table, "embedding_half"):
+            # Generated columns rewrite the table once here, so the swap stays a rename.
+            # This holds ACCESS EXCLUSIVE on the table for the whole rewrite.
+            logger.warning("resize_embeddings_prepare_table_rewrite", table=table)
+            await db.execute(text(f"""
+                ALTER TABLE {table} ADD COLUMN IF NOT EXISTS embedding_next_half halfvec({dimensions})
+                GENERATED ALWAYS AS (embedding_next::halfvec({dimensions})) STORED
+            """))
+        await db.commit()
+    logger.info("resize_embeddings_prepared", table=table, dimensions=dimensions)
+
+
+async def backfill(table: str, dimensions: int, batch_size: int) -> int:
+    # Rows that already have embedding_next are skipped, so reruns resume without a checkpoint
+    return await reembed(table, column="embedding_next", dimensions=dimensions, batch_size=batch_size, only_missing=True)
+
+
+async def swap(table: str, dimensions: int, batch_size: int) -> None:
+    table_indexes = TABLES[table]
+    # Catch up on rows written since the last backfill run
+    await backfill(table, dimensions, batch_size)
+
+    async with AsyncSessionLocal() as db:
+        has_half = await _has_column(db, table, "embedding_next_half")
+        # Rebuild the same indexes the table has now, see app.jobs.vector_storage_indexes
+        half_indexed = has_half and await _has_index(db, f"{table}_embedding_half_idx")
+
+    indexes = {suffix: ddl.format(dimensions=dimensions) for suffix, ddl in table_indexes.items()}
+    if half_indexed:
+        indexes.pop("embedding_idx")
+        indexes["embedding_half_idx"] = "USING hnsw (embedding_next_half halfvec_ip_ops)"
+    # CONCURRENTLY can't run inside a transaction block
+    async with async_engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for suffix, ddl in indexes.items():
+            await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {table}_{suffix}_next"))
+            await conn.execute(text(f"CREATE INDEX CONCURRENTLY {table}_{suffix}_next ON {table} {ddl}"))
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(text(f"LOCK TABLE {table} IN SHARE ROW EXCLUSIVE MODE"))
+        missing = await db.execute(text(f"SELECT count(*) FROM {table} WHERE embedding_next IS NULL AND embedding IS NOT NULL"))
+        missing = missing.scalar_one()
+        if missing:
+            await db.rollback()
+            raise RuntimeError(f"{missing} rows were written during the swap, run swap again")
+
+        await db.execute(text(f"ALTER TABLE {table} RENAME COLUMN embedding TO embedding_old"))
+        await db.execute(text(f"ALTER TABLE {table} RENAME COLUMN embedding_next TO embedding"))
+        if table in ("external_articles", "article_chunks"):
+            await db.execute(text(f"ALTER TABLE {table} ALTER COLUMN embedding SET NOT NULL"))
+            await db.execute(text(f"ALTER TABLE {table} ALTER COLUMN embedding_old DROP NOT NULL"))
+        if has_half:
+            await db.execute(text(f"ALTER TABLE {table} RENAME COLUMN embedding_half TO embedding_half_old"))
+            await db.execute(text(f"ALTER TABLE {table} RENAME COLUMN embedding_next_half TO embedding_half"))
+        for suffix in indexes:
+            await db.execute(text(f"ALTER INDEX IF EXISTS {table}_{suffix} RENAME TO {table}_{suffix}_old"))
+            await db.execute(text(f"ALTER INDEX {table}_{suffix}_next RENAME TO {table}_{suffix}"))
+        await db.commit()
+    logger.info("resize_embeddings_swapped", table=table, dimensions=dimensions)
+    if table == "thoughts":
+        await reconcile_profiles()
+
+
+async def cleanup(table: str) -> None:
+    async with AsyncSessionLocal() as db:
+        # Dropping a column drops its index with it
+        await db.execute(text(f"ALTER TABLE {table} DROP COLUMN IF EXISTS embedding_half_old"))
+        await db.execute(text(f"ALTER TABLE {table} DROP COLUMN IF EXISTS embedding_old"))
+        await db.commit()
+    logger.info("resize_embeddings_cleaned_up", table=table)
+
+
+async def main(args) -> None:
+    if args.step == "prepare":
+        await prepare(args.table, args.dimensions)
+    elif args.step == "backfill":
+        await backfill(args.table, args.dimensions, args.batch_size)
+    elif args.step == "swap":
+        await swap(args.table, args.dimensions, args.batch_size)
+    elif args.step == "cleanup":
+        await cleanup(args.table)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-embed a table into a new vector width")
+    parser.add_argument(
+        "step",
+        choices=["prepare", "backfill", "swap", "cleanup"],
+        help="prepare rewrites tables with embedding_half under an exclusive lock, run it in a maintenance window",
+    )
+    parser.add_argument("--table", choices=list(TABLES.keys()), required=True)
+    parser.add_argument("--dimensions", type=int, required=True)
+    parser.add_argument("--batch-size", type=int, default=500)
+    asyncio.run(main(parser.parse_args()))
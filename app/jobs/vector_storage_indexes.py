@@ -0,0 +1,46 @@
+"""
+Build the HNSW indexes for a VECTOR_STORAGE mode and drop the other mode's.
+
+Migrations index the full precision `embedding` column (VECTOR_STORAGE=vector).
+Before deploying with VECTOR_STORAGE=halfvec, build the halfvec indexes:
+
+    python -m app.jobs.vector_storage_indexes --storage halfvec
+    # deploy with VECTOR_STORAGE=halfvec, then drop the indexes nothing reads
+    python -m app.jobs.vector_storage_indexes --storage halfvec --drop-other
+
+Indexes are built and dropped CONCURRENTLY, searches keep running throughout.
+"""
+
+import argparse
+import asyncio
+
+from sqlalchemy import text
+
+from app.core.logging import logger
+from app.database.database import async_engine
+from app.database.vector_search import VECTOR_STORAGE_INDEXES
+
+TABLES = ("thoughts", "external_articles")
+
+
+async def main(storage: str, drop_other: bool = False) -> None:
+    # CONCURRENTLY can't run inside a transaction block
+    async with async_engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for table in TABLES:
+            suffix, ddl = VECTOR_STORAGE_INDEXES[storage]
+            await conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {table}_{suffix} ON {table} {ddl}"))
+            logger.info("vector_storage_index_built", table=table, index=f"{table}_{suffix}")
+            if drop_other:
+                for other, (other_suffix, _) in VECTOR_STORAGE_INDEXES.items():
+                    if other != storage:
+                        await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {table}_{other_suffix}"))
+                        logger.info("vector_storage_index_dropped", table=table, index=f"{table}_{other_suffix}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the HNSW indexes a VECTOR_STORAGE mode searches")
+    parser.add_argument("--storage", choices=list(VECTOR_STORAGE_INDEXES.keys()), required=True)
+    parser.add_argument("--drop-other", action="store_true", help="drop the other mode's indexes, once no deployment reads them")
+    args = parser.parse_args()
+    asyncio.run(main(args.storage, args.drop_other))
@@ -4,14 +4,16 @@ from langgraph.graph.state import CompiledStateGraph
 from langchain_core.messages import HumanMessage,  SystemMessage
 from langchain_core.runnables import RunnableConfig
 from psycopg_pool import AsyncConnectionPool
+from pgvector.psycopg import register_vector_async
 from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
 from typing import Optional
 from app.llm_utils.agents.flow_agent.models import SelfReflectionAgentState, SelfReflectionAgentResult, SelfReflectionAgentConnectorResult, SelfReflectionAgentFinalResult
 from app.llm_utils.agents.flow_agent.prompts import (THEME_EXTRACTOR_SYSTEM_PROMPT, EMOTION_EXTRACTOR_SYSTEM_PROMPT, 
                      GOAL_EXTRACTOR_SYSTEM_PROMPT, CONNECTOR_EXTRACTOR_SYSTEM_PROMPT)
-from app.llm_utils.embeddings.embeddings import embed_text_openai
-from app.llm_utils.agents.flow_agent.utils import get_similar_thoughts, pretty_thoughts, to_pgvector
+from app.llm_utils.embeddings.embeddings import embed_query
+from app.llm_utils.agents.flow_agent.utils import get_similar_thoughts, pretty_thoughts
 from app.llm_utils.agents.flow_agent.models import ResultNode, ResultEdge
+from app.llm_utils.tokens import fit_to_budget, TOKEN_BUDGET_FLOW_THOUGHTS, TOKEN_BUDGET_FLOW_MESSAGE
 from sqlalchemy.orm import Session
 
 
@@ -27,6 +29,7 @@ POSTGRES_URL = os.environ["THOUGHT_AGENT_DB_URL"]
 class FlowAgent:
     def __init__(self, llm=None, max_themes=2, max_emotions=2, max_goals=2):
         self.llm = llm
+        self.model = getattr(llm, "model_name", "gpt-4o")
         self._connection_pool: Optional[AsyncConnectionPool] = None
         self.graph: Optional[CompiledStateGraph] = None
         
@@ -45,6 +48,7 @@ class FlowAgent:
                     POSTGRES_URL,
                     max_size=max_size,
                     open=False,
+                    configure=register_vector_async,
                     kwargs={
                         "autocommit": True,
                         "connect_timeout": 5,
@@ -62,13 +66,14 @@ class FlowAgent:
             user_id = state["user_id"]
             query = state["messages"][-1].content
             print(f"Query: {query}")
-            embedding = await embed_text_openai(query)
+            embedding = await embed_query(query)
             session = config.get("configurable").get("session")
             print(f"Session: {session}")
-            results = await get_similar_thoughts(session, to_pgvector(embedding), 
+            results = await get_similar_thoughts(session, embedding, 
                                 user_id=user_id, 
                                 top_k=5)
-            thoughts = pretty_thoughts(results)
+            # Sent to all three extractors, keep it within budget once here
+            thoughts = fit_to_budget(pretty_thoughts(results), "flow_thoughts", TOKEN_BUDGET_FLOW_THOUGHTS, model=self.model)
             print(f"Thoughts: {thoughts}")
             return {"thoughts": thoughts}
         except Exception as e:
@@ -218,7 +223,7 @@ class FlowAgent:
         
         config = {"configurable": {"thread_id": f"{user_id}", "session": session}}
         state = {
-            "messages": [HumanMessage(content=question)],
+            "messages": [HumanMessage(content=fit_to_budget(question, "flow_message", TOKEN_BUDGET_FLOW_MESSAGE, model=self.model))],
             "user_id": user_id,
             "max_themes": self.max_themes,
             "max_emotions": self.max_emotions,
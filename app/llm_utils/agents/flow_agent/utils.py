@@ -1,23 +1,9 @@
-from sqlalchemy import text
+from app.database.vector_search import search_user_thoughts
 
 async def get_similar_thoughts(db, query_embedding, user_id, top_k=5):
-    sql = text("""
-        SELECT id, title, full_content, embedding <#> (:embedding)::vector AS distance, created_at
-        FROM thoughts
-        WHERE user_id = :user_id
-        ORDER BY embedding <#> (:embedding)::vector, created_at DESC
-        LIMIT :top_k
-    """)
-    result = await db.execute(
-        sql,
-        {
-            "embedding": query_embedding,
-            "user_id": user_id,
-            "top_k": top_k
-        }
-    )
+    result = await search_user_thoughts(db, query_embedding, user_id, top_k)
     keyed_results = []
-    for r in result.all():
+    for r in result:
         keyed_results.append({
             "id": r[0],
             "title": r[1],
@@ -28,10 +14,6 @@ async def get_similar_thoughts(db, query_embedding, user_id, top_k=5):
     return keyed_results
 
 
-def to_pgvector(vec):
-    return "[" + ",".join(f"{x:.6f}" for x in vec) + "]"
-
-
 def pretty_thoughts(results):
     texts = []
     for result in results:
@@ -14,6 +14,7 @@ from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, trim_m
 from langchain_openai import ChatOpenAI
 from sqlalchemy.orm import Session
 from psycopg_pool import AsyncConnectionPool
+from pgvector.psycopg import register_vector_async
 from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
 from asgiref.sync import sync_to_async
 from langgraph.types import StateSnapshot
@@ -66,6 +67,7 @@ class ReactAgent:
                     POSTGRES_URL,
                     max_size=max_size,
                     open=False,
+                    configure=register_vector_async,
                     kwargs={
                         "autocommit": True,
                         "connect_timeout": 5,
@@ -4,9 +4,9 @@ sys.path.append("..")
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import BaseTool, tool
 from sqlalchemy import text, select
-from app.llm_utils.embeddings.embeddings import embed_text_openai
+from app.llm_utils.embeddings.embeddings import embed_query
 from app.models.models import Thought
-from app.utils.ext_articles import to_pgvector
+from app.database.vector_search import search_user_thoughts
 from langchain_tavily import TavilySearch
 
 from dotenv import load_dotenv
@@ -17,7 +17,7 @@ load_dotenv()
 def pretty_thoughts(results):
     texts = []
     for result in results:
-        id, title, full_content, distance = result
+        id, title, full_content, distance, created_at = result
         texts.append(f"### ID:{id} \n\n ### Title:{title}({-distance:.2f})\n\nContent:\n{full_content[:100]}")
     final_text = "\n\n".join(texts)
     return final_text
@@ -25,23 +25,7 @@ def pretty_thoughts(results):
 
 async def get_similar_thoughts(query_embedding, user_id, top_k=5, session=None):
     try:
-        sql = text("""
-            SELECT id, title, full_content, embedding <#> (:embedding)::vector AS distance
-            FROM thoughts
-            WHERE user_id = :user_id
-            ORDER BY embedding <#> (:embedding)::vector
-            LIMIT :top_k
-        """)
-        result = await session.execute(
-            sql,
-            {
-                "embedding": query_embedding,
-                "user_id": user_id,
-                "top_k": top_k
-            }
-        )
-        
-        return result.all()
+        return await search_user_thoughts(session, query_embedding, user_id, top_k)
     except Exception as e:
         print(e)
         return []
@@ -61,11 +45,9 @@ async def fetch_relevant_thoughts(query: str, config: RunnableConfig) -> str:
         print(f"session: {session}")
     except Exception as e:
         raise("User ID not provided")
-    embedding =  await embed_text_openai(query)
+    embedding =  await embed_query(query)
     print(f"embedding: {len(embedding)}")
-    pg_vector_str = to_pgvector(embedding)
-    print(f"pg_vector_str: {len(pg_vector_str)}")
-    response = await get_similar_thoughts(pg_vector_str, user_id, top_k=5, session=session)
+    response = await get_similar_thoughts(embedding, user_id, top_k=5, session=session)
     print(f"response: {len(response)}")
     result = pretty_thoughts(response)
     return result
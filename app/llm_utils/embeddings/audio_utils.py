@@ -1,23 +1,24 @@
-from openai import OpenAI
+import asyncio
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
-from app.utils.aws_utils import get_file_from_s3
 import io
 load_dotenv()
 
 
 
-client = OpenAI()
+client = AsyncOpenAI()
 
-def get_audio_transcript(audio_url):
-    audio_file = get_file_from_s3(audio_url)
-    buffer = io.BytesIO(audio_file)
-    buffer.name = audio_url
-    transcript = client.audio.transcriptions.create(
+async def get_audio_transcript(audio_bytes: bytes, filename: str = "audio.mp3"):
+    buffer = io.BytesIO(audio_bytes)
+    # The API infers the audio format from the file name
+    buffer.name = filename
+    transcript = await client.audio.transcriptions.create(
         file=buffer,
         model="whisper-1"
     )
     return transcript.text
 
 if __name__ == "__main__":
-    audio_url = "/Users/deekshith/Downloads/test.mp3"
-    print(get_audio_transcript(audio_url))
\ No newline at end of file
+    audio_path = "/Users/deekshith/Downloads/test.mp3"
+    with open(audio_path, "rb") as f:
+        print(asyncio.run(get_audio_transcript(f.read(), audio_path)))
@@ -0,0 +1,103 @@
+"""
+Micro-batching front-end for embedding calls.
+
+Concurrent `embed(text)` calls arriving within a short window are coalesced
+into a single multi-input request, bounded by a max batch size and an
+approximate token budget. Every caller awaits its own future and receives
+only its own vector.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, List, Optional
+
+from app.core.logging import logger
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English text
+    return len(text) // 4 + 1
+
+
+class EmbeddingBatcher:
+    def __init__(
+        self,
+        embed_batch: Callable[[List[str]], Awaitable[List[List]]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 10,
+        max_tokens: int = 100_000,
+        count_tokens: Callable[[str], int] = estimate_tokens,
+    ):
+        self.embed_batch = embed_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_tokens = max_tokens
+        self.count_tokens = count_tokens
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._pending_tokens = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._inflight: set[asyncio.Task] = set()
+
+        self.requests = 0
+        self.batches = 0
+
+    async def embed(self, text: str) -> List:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Scripts may run several event loops over the process lifetime
+            self._loop = loop
+            self._pending = []
+            self._pending_tokens = 0
+            self._timer = None
+
+        tokens = self.count_tokens(text)
+        if self._pending and self._pending_tokens + tokens > self.max_tokens:
+            self._flush()
+
+        future = loop.create_future()
+        self._pending.append((text, future))
+        self._pending_tokens += tokens
+        self.requests += 1
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch = self._pending
+        self._pending = []
+        self._pending_tokens = 0
+        self.batches += 1
+
+        task = asyncio.ensure_future(self._run(batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _run(self, batch: list[tuple[str, asyncio.Future]]) -> None:
+        try:
+            embeddings = await self.embed_batch([text for text, _ in batch])
+        except Exception as e:
+            logger.error("embedding_batch_error", size=len(batch), error=str(e))
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), embedding in zip(batch, embeddings):
+            # Callers may have been cancelled while the batch was in flight
+            if not future.done():
+                future.set_result(embedding)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "avg_batch_size": self.requests / self.batches if self.batches else 0.0,
+        }
@@ -0,0 +1,121 @@
+"""
+Two-tier embedding cache keyed by sha256(model + text).
+
+An in-process LRU sits in front of the Postgres `embedding_cache` table, so
+repeated texts (unchanged thought updates, repeated searches, agent tool
+queries) skip the embeddings API entirely.
+
+Rows record when they were last read (at day granularity, to keep hits from
+turning into writes). Rows unused for EMBEDDING_CACHE_TTL_DAYS are ignored by
+reads and deleted by app.jobs.prune_embedding_cache.
+"""
+
+import hashlib
+import os
+from typing import Optional
+
+from sqlalchemy import select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.cache import LRUCache
+from app.core.logging import logger
+from app.database.database import AsyncSessionLocal
+from app.models.models import EmbeddingCacheEntry
+
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+EMBEDDING_CACHE_PERSIST = os.getenv("EMBEDDING_CACHE_PERSIST", "true").lower() == "true"
+EMBEDDING_CACHE_TTL_DAYS = int(os.getenv("EMBEDDING_CACHE_TTL_DAYS", "90"))
+
+
+class EmbeddingCache:
+    def __init__(self, max_size: int = EMBEDDING_CACHE_SIZE, persist: bool = EMBEDDING_CACHE_PERSIST):
+        self.memory = LRUCache("embeddings", max_size=max_size)
+        self.persist = persist
+        self.db_hits = 0
+        self.db_misses = 0
+        self.db_errors = 0
+
+    @staticmethod
+    def key(model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\x00{text}".encode()).hexdigest()
+
+    def get_local(self, key: str) -> Optional[list]:
+        """In-process lookup only, no database round trip."""
+        return self.memory.get(key)
+
+    async def get_many(self, keys: list[str], check_memory: bool = True) -> dict[str, list]:
+        """`check_memory=False` when the caller already missed the in-process tier for these keys."""
+        found = {}
+        missing = []
+        for key in keys:
+            embedding = self.memory.get(key) if check_memory else None
+            if embedding is None:
+                missing.append(key)
+            else:
+                found[key] = embedding
+
+        if missing and self.persist:
+            try:
+                async with AsyncSessionLocal() as db:
+                    result = await db.execute(
+                        select(EmbeddingCacheEntry.key, EmbeddingCacheEntry.embedding).where(
+                            EmbeddingCacheEntry.key.in_(missing),
+                            EmbeddingCacheEntry.last_used_at > text(f"now() - interval '{EMBEDDING_CACHE_TTL_DAYS} days'"),
+                        )
+                    )
+                    rows = result.all()
+                    if rows:
+                        await db.execute(
+                            update(EmbeddingCacheEntry)
+                            .where(
+                                EmbeddingCacheEntry.key.in_([key for key, _ in rows]),
+                                EmbeddingCacheEntry.last_used_at < text("now() - interval '1 day'"),
+                            )
+                            .values(last_used_at=text("now()"))
+                        )
+                        await db.commit()
+            except Exception as e:
+                # The cache must never take down an embedding call
+                self.db_errors += 1
+                logger.error("embedding_cache_read_error", error=str(e))
+                rows = []
+            for key, embedding in rows:
+                embedding = embedding.tolist()
+                self.memory.set(key, embedding)
+                found[key] = embedding
+            self.db_hits += len(rows)
+            self.db_misses += len(missing) - len(rows)
+        return found
+
+    async def set_many(self, model: str, embeddings: dict[str, list]) -> None:
+        for key, embedding in embeddings.items():
+            self.memory.set(key, embedding)
+
+        if embeddings and self.persist:
+            try:
+                async with AsyncSessionLocal() as db:
+                    stmt = pg_insert(EmbeddingCacheEntry)
+                    # An expired row is re-embedded, make it live again
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=["key"],
+                        set_={"embedding": stmt.excluded.embedding, "last_used_at": text("now()")},
+                    )
+                    await db.execute(
+                        stmt,
+                        [{"key": key, "model": model, "embedding": embedding} for key, embedding in embeddings.items()],
+                    )
+                    await db.commit()
+            except Exception as e:
+                self.db_errors += 1
+                logger.error("embedding_cache_write_error", error=str(e))
+
+    def stats(self) -> dict:
+        return {
+            **self.memory.stats(),
+            "db_hits": self.db_hits,
+            "db_misses": self.db_misses,
+            "db_errors": self.db_errors,
+        }
+
+
+embedding_cache = EmbeddingCache()
@@ -0,0 +1,35 @@
+"""
+Passage level embeddings for long documents.
+
+The text is split into token bounded chunks that are embedded in one batched
+call, and the document vector is the token weighted mean of the chunk vectors,
+re-normalized so inner product search keeps working on it.
+"""
+
+import os
+from typing import List, Optional
+
+import numpy as np
+
+from app.llm_utils.embeddings.embeddings import embed_texts
+from app.llm_utils.tokens import chunk_text
+
+ARTICLE_CHUNK_TOKENS = int(os.getenv("ARTICLE_CHUNK_TOKENS", "512"))
+ARTICLE_CHUNK_OVERLAP = int(os.getenv("ARTICLE_CHUNK_OVERLAP", "64"))
+
+
+def pool_embeddings(embeddings: List[List[float]], weights: List[int]) -> List[float]:
+    pooled = np.average(np.array(embeddings, dtype=np.float32), axis=0, weights=weights)
+    norm = np.linalg.norm(pooled)
+    return (pooled / norm if norm else pooled).tolist()
+
+
+async def embed_document(text: str, dimensions: Optional[int] = None) -> tuple[List[dict], List[float]]:
+    """Returns the chunks (chunk_index, text, token_count, embedding) and the pooled document vector."""
+    chunks = chunk_text(text, ARTICLE_CHUNK_TOKENS, ARTICLE_CHUNK_OVERLAP) or [(text, 1)]
+    embeddings = await embed_texts([chunk for chunk, _ in chunks], dimensions=dimensions)
+    passages = [
+        {"chunk_index": i, "text": chunk, "token_count": token_count, "embedding": embedding}
+        for i, ((chunk, token_count), embedding) in enumerate(zip(chunks, embeddings))
+    ]
+    return passages, pool_embeddings(embeddings, [token_count for _, token_count in chunks])
@@ -1,11 +1,24 @@
-from openai import AsyncOpenAI
-from typing import List
+from typing import List, Optional
+import numpy as np
+from app.core.cache import LRUCache
+from app.core.config import EMBEDDING_DIMENSIONS
+from app.llm_utils.embeddings.cache import embedding_cache
+from app.llm_utils.embeddings.batcher import EmbeddingBatcher
+from app.llm_utils.embeddings.providers import get_embedding_provider
+from app.llm_utils.tokens import count_tokens
 
+import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-client = AsyncOpenAI()
+# Micro-batching of concurrent embed_text calls
+EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("EMBEDDING_BATCH_WINDOW_MS", "10"))
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "64"))
+EMBEDDING_BATCH_MAX_TOKENS = int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "100000"))
+# Search queries and agent tool queries, see embed_query
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "2048"))
+QUERY_EMBEDDING_CACHE_TTL_SECONDS = float(os.getenv("QUERY_EMBEDDING_CACHE_TTL_SECONDS", "3600"))
 
 # model, _, preprocess = open_clip.create_model_and_transforms('ViT-B-32', pretrained='openai')
 # tokenizer = open_clip.get_tokenizer('ViT-B-32')
@@ -22,11 +35,73 @@ client = AsyncOpenAI()
 #         embedding = model.encode_image(image_input).float()
 #         return embedding[0].tolist()
 
-# Embedding using openai text-embedding-3-small
-async def embed_text_openai(text: str) -> List:
-    
-    response = await client.embeddings.create(
-        input=text,
-        model="text-embedding-3-small"
-    )
-    return response.data[0].embedding
\ No newline at end of file
+def _cache_namespace(dimensions: int) -> str:
+    # Vectors of different widths must never share a cache entry
+    return f"{get_embedding_provider().model}@{dimensions}"
+
+
+async def _embed_and_cache(texts: List[str], dimensions: int = EMBEDDING_DIMENSIONS, memory_checked: bool = False) -> List[List]:
+    namespace = _cache_namespace(dimensions)
+    keys = [embedding_cache.key(namespace, text) for text in texts]
+    # One cache lookup per batch, then duplicate and uncached texts are embedded once
+    found = await embedding_cache.get_many(list(dict.fromkeys(keys)), check_memory=not memory_checked)
+    missing = {key: text for key, text in zip(keys, texts) if key not in found}
+    if missing:
+        embedded = dict(zip(missing.keys(), await get_embedding_provider().embed(list(missing.values()), dimensions)))
+        await embedding_cache.set_many(namespace, embedded)
+        found.update(embedded)
+    return [found[key] for key in keys]
+
+
+async def _embed_batch(texts: List[str]) -> List[List]:
+    # embed_text already missed the in-process cache for every text in the batch
+    return await _embed_and_cache(texts, memory_checked=True)
+
+
+# Coalesces concurrent single-text calls into multi-input requests
+embedding_batcher = EmbeddingBatcher(
+    _embed_batch,
+    max_batch_size=EMBEDDING_BATCH_MAX_SIZE,
+    max_wait_ms=EMBEDDING_BATCH_WINDOW_MS,
+    max_tokens=EMBEDDING_BATCH_MAX_TOKENS,
+    count_tokens=count_tokens,
+)
+
+
+# Embedding with the configured provider (EMBEDDING_PROVIDER / EMBEDDING_DIMENSIONS)
+async def embed_text(text: str) -> List:
+    cached = embedding_cache.get_local(embedding_cache.key(_cache_namespace(EMBEDDING_DIMENSIONS), text))
+    if cached is not None:
+        return cached
+    # The batcher checks the persistent cache once for the whole batch
+    return await embedding_batcher.embed(text)
+
+
+async def embed_texts(texts: List[str], dimensions: Optional[int] = None) -> List[List]:
+    """
+    Embed many texts, only the uncached ones reach the provider in a single call.
+    `dimensions` overrides the configured width, e.g. while re-embedding into a new column.
+    """
+    return await _embed_and_cache(texts, dimensions or EMBEDDING_DIMENSIONS)
+
+
+query_embedding_cache = LRUCache("query_embeddings", max_size=QUERY_EMBEDDING_CACHE_SIZE, ttl_seconds=QUERY_EMBEDDING_CACHE_TTL_SECONDS)
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split()).lower()
+
+
+async def embed_query(query: str) -> np.ndarray:
+    """
+    Embedding of a search query, cached in process after whitespace and case normalization.
+    Returned arrays are shared between callers and read-only.
+    """
+    query = normalize_query(query)
+    key = (_cache_namespace(EMBEDDING_DIMENSIONS), query)
+    vector = query_embedding_cache.get(key)
+    if vector is None:
+        vector = np.asarray(await embed_text(query), dtype=np.float32)
+        vector.flags.writeable = False
+        query_embedding_cache.set(key, vector)
+    return vector
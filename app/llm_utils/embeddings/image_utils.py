@@ -1,21 +1,18 @@
 import base64
-from openai import OpenAI
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
-
-from app.utils.aws_utils import get_file_from_s3
 load_dotenv()
 
 
-client = OpenAI()
+client = AsyncOpenAI()
 
 # Function to encode the image
-def encode_image(image_path):
-    image_data = get_file_from_s3(image_path)
-    return base64.b64encode(image_data).decode("utf-8")
+def encode_image(image_bytes: bytes):
+    return base64.b64encode(image_bytes).decode("utf-8")
 
-def get_image_description(image_path, full_content):
-    base64_image = encode_image(image_path)
-    completion =  client.chat.completions.create(
+async def get_image_description(image_bytes: bytes, full_content):
+    base64_image = encode_image(image_bytes)
+    completion = await client.chat.completions.create(
         model="gpt-4.1",
         messages=[
             {
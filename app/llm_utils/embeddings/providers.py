@@ -0,0 +1,181 @@
+"""
+Embedding backends behind a common `embed(texts, dimensions)` interface.
+
+  - OpenAIEmbeddingProvider: the embeddings API (EMBEDDING_MODEL)
+  - LocalEmbeddingProvider:  a sentence-embedding model exported to ONNX, run on
+                             CPU with ONNX Runtime (pip install onnxruntime tokenizers)
+  - FakeEmbeddingProvider:   deterministic unit vectors derived from the text hash,
+                             for tests and offline benchmarks
+
+EMBEDDING_PROVIDER picks the one used by app.llm_utils.embeddings.embeddings.
+"""
+
+import asyncio
+import hashlib
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+from openai import AsyncOpenAI
+
+from app.core.config import EMBEDDING_MODEL, EMBEDDING_PROVIDER
+from app.llm_utils.tokens import count_tokens, fit_to_budget
+
+# Inputs per embeddings request, the API accepts up to 2048
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))
+# Total input tokens per embeddings request, the API rejects more than 300k
+EMBEDDING_REQUEST_MAX_TOKENS = int(os.getenv("EMBEDDING_REQUEST_MAX_TOKENS", "300000"))
+
+# Directory holding model.onnx and tokenizer.json, e.g. an export of all-MiniLM-L6-v2
+LOCAL_EMBEDDING_MODEL_PATH = os.getenv("LOCAL_EMBEDDING_MODEL_PATH", "models/all-MiniLM-L6-v2")
+LOCAL_EMBEDDING_BATCH_SIZE = int(os.getenv("LOCAL_EMBEDDING_BATCH_SIZE", "32"))
+LOCAL_EMBEDDING_MAX_LENGTH = int(os.getenv("LOCAL_EMBEDDING_MAX_LENGTH", "256"))
+LOCAL_EMBEDDING_THREADS = int(os.getenv("LOCAL_EMBEDDING_THREADS", "2"))
+
+# Simulated per-request latency of the fake provider
+FAKE_EMBEDDING_LATENCY_MS = float(os.getenv("FAKE_EMBEDDING_LATENCY_MS", "0"))
+
+
+class EmbeddingProvider(ABC):
+    # Identifies the vector space, part of every embedding cache key
+    model: str
+
+    @abstractmethod
+    async def embed(self, texts: List[str], dimensions: int) -> List[List[float]]:
+        ...
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    def __init__(self, model: str = EMBEDDING_MODEL, batch_size: int = EMBEDDING_BATCH_SIZE, max_request_tokens: int = EMBEDDING_REQUEST_MAX_TOKENS):
+        self.model = model
+        self.batch_size = batch_size
+        self.max_request_tokens = max_request_tokens
+        self.client = AsyncOpenAI()
+
+    def _batches(self, texts: List[str]):
+        batch, batch_tokens = [], 0
+        for text in texts:
+            tokens = count_tokens(text, self.model)
+            if batch and (len(batch) >= self.batch_size or batch_tokens + tokens > self.max_request_tokens):
+                yield batch
+                batch, batch_tokens = [], 0
+            batch.append(text)
+            batch_tokens += tokens
+        if batch:
+            yield batch
+
+    async def embed(self, texts: List[str], dimensions: int) -> List[List[float]]:
+        # Oversized inputs would fail the whole request after the round trip
+        texts = [fit_to_budget(text, "embedding", model=self.model) for text in texts]
+        embeddings = []
+        for batch in self._batches(texts):
+            response = await self.client.embeddings.create(
+                input=batch,
+                model=self.model,
+                dimensions=dimensions
+            )
+            # Results carry their input index, don't rely on response ordering
+            embeddings.extend(item.embedding for item in sorted(response.data, key=lambda item: item.index))
+        return embeddings
+
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    def __init__(
+        self,
+        model_path: str = LOCAL_EMBEDDING_MODEL_PATH,
+        batch_size: int = LOCAL_EMBEDDING_BATCH_SIZE,
+        max_length: int = LOCAL_EMBEDDING_MAX_LENGTH,
+        threads: int = LOCAL_EMBEDDING_THREADS,
+    ):
+        try:
+            import onnxruntime
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise RuntimeError("EMBEDDING_PROVIDER=local requires `pip install onnxruntime tokenizers`") from e
+
+        self.model = f"local/{os.path.basename(os.path.normpath(model_path))}"
+        self.batch_size = batch_size
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_path, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(model_path, "model.onnx"), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.dimensions = self.session.get_outputs()[0].shape[-1]
+        # Inference is CPU bound, keep it off the event loop and serialized per process
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="local-embeddings")
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            inputs["token_type_ids"] = np.zeros_like(input_ids)
+
+        token_embeddings = self.session.run(None, inputs)[0]
+        # Mean pooling over real tokens, then L2 normalize so inner product is cosine similarity
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.linalg.norm(pooled, axis=1, keepdims=True)
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        embeddings = []
+        for start in range(0, len(texts), self.batch_size):
+            embeddings.extend(self._embed_batch(texts[start:start + self.batch_size]).tolist())
+        return embeddings
+
+    async def embed(self, texts: List[str], dimensions: int) -> List[List[float]]:
+        if dimensions != self.dimensions:
+            raise ValueError(f"{self.model} produces {self.dimensions} dimensions, EMBEDDING_DIMENSIONS is {dimensions}")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._embed, texts)
+
+
+class FakeEmbeddingProvider(EmbeddingProvider):
+    model = "fake"
+
+    def __init__(self, latency_ms: float = FAKE_EMBEDDING_LATENCY_MS):
+        self.latency = latency_ms / 1000
+
+    @staticmethod
+    def _vector(text: str, dimensions: int) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(dimensions)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    async def embed(self, texts: List[str], dimensions: int) -> List[List[float]]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return [self._vector(text, dimensions) for text in texts]
+
+
+PROVIDERS = {
+    "openai": OpenAIEmbeddingProvider,
+    "local": LocalEmbeddingProvider,
+    "fake": FakeEmbeddingProvider,
+}
+
+_provider: Optional[EmbeddingProvider] = None
+
+
+def get_embedding_provider() -> EmbeddingProvider:
+    global _provider
+    if _provider is None:
+        if EMBEDDING_PROVIDER not in PROVIDERS:
+            raise RuntimeError(f"Unsupported EMBEDDING_PROVIDER: {EMBEDDING_PROVIDER}")
+        _provider = PROVIDERS[EMBEDDING_PROVIDER]()
+    return _provider
+
+
+def set_embedding_provider(provider: EmbeddingProvider) -> None:
+    """Override the configured provider, e.g. the fake one for dry runs."""
+    global _provider
+    _provider = provider
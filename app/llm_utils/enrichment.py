@@ -0,0 +1,82 @@
+import os
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.llm_utils.embeddings.audio_utils import get_audio_transcript
+from app.llm_utils.embeddings.embeddings import embed_text
+from app.llm_utils.embeddings.image_utils import get_image_description
+from app.llm_utils.tags import generate_tags_and_title
+from app.models.models import Tag
+from app.utils.aws_utils import upload_file_to_s3
+from app.utils.stage_graph import StageGraph
+
+STAGE_TIMEOUT_UPLOAD = float(os.getenv("STAGE_TIMEOUT_UPLOAD", "30"))
+STAGE_TIMEOUT_VISION = float(os.getenv("STAGE_TIMEOUT_VISION", "60"))
+STAGE_TIMEOUT_TRANSCRIPT = float(os.getenv("STAGE_TIMEOUT_TRANSCRIPT", "120"))
+STAGE_TIMEOUT_EMBEDDING = float(os.getenv("STAGE_TIMEOUT_EMBEDDING", "30"))
+STAGE_TIMEOUT_TAGS = float(os.getenv("STAGE_TIMEOUT_TAGS", "60"))
+
+
+async def enrich_thought(
+    db: AsyncSession,
+    user_id: str,
+    file_path: str,
+    text: Optional[str] = None,
+    image_bytes: Optional[bytes] = None,
+    audio_bytes: Optional[bytes] = None,
+    upload: bool = True,
+) -> dict:
+    """
+    Enrich a thought as a stage graph. The image and audio branches run concurrently
+    (each uploading while the model reads the bytes), then the embedding and the
+    tags/title generation both run on the combined full_content.
+    """
+    text_content = f"<Thought>: {text} </Thought>" if text else ""
+    graph = StageGraph("enrich_thought")
+
+    async def existing_tags(_):
+        # Only stage touching the session, so it is safe to run alongside the others
+        result = await db.execute(select(Tag.name).where(Tag.user_id == user_id))
+        return result.scalars().all()
+
+    graph.add("existing_tags", existing_tags)
+
+    if image_bytes:
+        if upload:
+            graph.add("image_upload", lambda _: upload_file_to_s3(f"{file_path}/image.png", image_bytes), timeout=STAGE_TIMEOUT_UPLOAD)
+        graph.add("image_description", lambda _: get_image_description(image_bytes, text_content), timeout=STAGE_TIMEOUT_VISION)
+
+    if audio_bytes:
+        if upload:
+            graph.add("audio_upload", lambda _: upload_file_to_s3(f"{file_path}/audio.mp3", audio_bytes), timeout=STAGE_TIMEOUT_UPLOAD)
+        graph.add("audio_transcript", lambda _: get_audio_transcript(audio_bytes, f"{file_path}/audio.mp3"), timeout=STAGE_TIMEOUT_TRANSCRIPT)
+
+    async def full_content(inputs):
+        content = text_content
+        if "image_description" in inputs:
+            content += f"\n\n<Image>: {inputs['image_description']} </Image>"
+        if "audio_transcript" in inputs:
+            content += f"\n\n<Audio>: {inputs['audio_transcript']} </Audio>"
+        return content
+
+    graph.add("full_content", full_content, deps=tuple(s for s in ("image_description", "audio_transcript") if s in graph.stages))
+    graph.add("embedding", lambda inputs: embed_text(inputs["full_content"]), deps=("full_content",), timeout=STAGE_TIMEOUT_EMBEDDING)
+    graph.add(
+        "tags_and_title",
+        lambda inputs: generate_tags_and_title(inputs["full_content"], inputs["existing_tags"]),
+        deps=("full_content", "existing_tags"),
+        timeout=STAGE_TIMEOUT_TAGS,
+    )
+
+    results = await graph.run()
+    title, tags = results["tags_and_title"]
+    return {
+        "full_content": results["full_content"],
+        "embedding": results["embedding"],
+        "title": title,
+        "tags": tags,
+        "image_url": results.get("image_upload"),
+        "audio_url": results.get("audio_upload"),
+    }
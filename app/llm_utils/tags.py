@@ -1,11 +1,14 @@
+import asyncio
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
+from app.llm_utils.tokens import fit_to_budget, TOKEN_BUDGET_THOUGHT_TAGS, TOKEN_BUDGET_TITLE, TOKEN_BUDGET_ARTICLE_TAGS
 
 load_dotenv()
 
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.2)
+LLM_MODEL = "gpt-4o-mini"
+llm = ChatOpenAI(model=LLM_MODEL, temperature=0.2)
 
 SYSTEM_PROMPT = """
 You are an helpful assistant that generates tags and a title based on the text.
@@ -50,7 +53,7 @@ class Title(BaseModel):
 class ArticleTags(BaseModel):
     tags: list[Tag] = Field(description="The tags that represent the article")
 
-def generate_tags_and_title(text: str, tags: list[Tag]) -> tuple[str, list[str]]:
+async def generate_tags_and_title(text: str, tags: list[str]) -> tuple[str, list[str]]:
     prompt = ChatPromptTemplate.from_messages([
         ("system", SYSTEM_PROMPT),
         ("user", "{text}")
@@ -59,7 +62,8 @@ def generate_tags_and_title(text: str, tags: list[Tag]) -> tuple[str, list[str]]
     structured_llm = llm.with_structured_output(TagsAndTitle)
     chain = prompt | structured_llm
 
-    result = chain.invoke({"text": text, "tags": tags})
+    text = fit_to_budget(text, "thought_tags", TOKEN_BUDGET_THOUGHT_TAGS, model=LLM_MODEL)
+    result = await chain.ainvoke({"text": text, "tags": tags})
     return result.title, [tag.name for tag in result.tags]
 
 
@@ -71,6 +75,7 @@ def generate_title(text: str) -> str:
         ])
         structured_llm = llm.with_structured_output(Title)
         chain = prompt | structured_llm
+        text = fit_to_budget(text, "title", TOKEN_BUDGET_TITLE, model=LLM_MODEL)
         result = chain.invoke({"text": text})
         return result.title
     except Exception as e:
@@ -79,8 +84,8 @@ def generate_title(text: str) -> str:
 
 if __name__ == "__main__":
     text = "I've been reading and thinking a lot about roman dyansty and it's collapse these days. I'm not sure what to think about it."
-    tags = [Tag(name="nature"), Tag(name="birds"), Tag(name="park"), Tag(name="walk"), Tag(name="robots"), Tag(name="ai"), Tag(name="chill")]
-    tags, title = generate_tags_and_title(text, tags)
+    tags = ["nature", "birds", "park", "walk", "robots", "ai", "chill"]
+    tags, title = asyncio.run(generate_tags_and_title(text, tags))
     print(tags)
     print(title)
 
@@ -101,5 +106,6 @@ def generate_article_tags(text: str) -> list[str]:
     ])
     structured_llm = llm.with_structured_output(ArticleTags)
     chain = prompt | structured_llm
+    text = fit_to_budget(text, "article_tags", TOKEN_BUDGET_ARTICLE_TAGS, model=LLM_MODEL)
     result = chain.invoke({"text": text})
     return [tag.name for tag in result.tags]
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""
+Token counting, budgeting and token-aware text splitting with tiktoken.
+
+Every model input goes through `fit_to_budget`, which truncates it to the
+budget of its purpose (and never past the model's own limit) before the
+request is sent, and records how many tokens each purpose consumes.
+"""
+
+import os
+import threading
+from functools import lru_cache
+from typing import List, Optional
+
+import tiktoken
+
+from app.core.config import EMBEDDING_MODEL
+from app.core.logging import logger
+
+# Max input tokens per request
+MODEL_TOKEN_LIMITS = {
+    "text-embedding-3-small": 8191,
+    "text-embedding-3-large": 8191,
+    "text-embedding-ada-002": 8191,
+    "gpt-4o": 128_000,
+    "gpt-4o-mini": 128_000,
+}
+
+# Per purpose input budgets, well below the model limits: none of these need the whole text
+TOKEN_BUDGET_THOUGHT_TAGS = int(os.getenv("TOKEN_BUDGET_THOUGHT_TAGS", "4000"))
+TOKEN_BUDGET_TITLE = int(os.getenv("TOKEN_BUDGET_TITLE", "2000"))
+# The lede of an article is enough for three topic tags
+TOKEN_BUDGET_ARTICLE_TAGS = int(os.getenv("TOKEN_BUDGET_ARTICLE_TAGS", "1000"))
+TOKEN_BUDGET_FLOW_THOUGHTS = int(os.getenv("TOKEN_BUDGET_FLOW_THOUGHTS", "6000"))
+TOKEN_BUDGET_FLOW_MESSAGE = int(os.getenv("TOKEN_BUDGET_FLOW_MESSAGE", "2000"))
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str = EMBEDDING_MODEL) -> tiktoken.Encoding:
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        # Non OpenAI models: cl100k_base is a close enough approximation for budgeting
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str, model: str = EMBEDDING_MODEL) -> int:
+    return len(get_encoding(model).encode(text, disallowed_special=()))
+
+
+class TokenMetrics:
+    """Per purpose counters of calls, tokens sent and truncations."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._purposes: dict[str, dict] = {}
+
+    def record(self, purpose: str, tokens: int, truncated: bool) -> None:
+        with self._lock:
+            counters = self._purposes.setdefault(purpose, {"calls": 0, "tokens": 0, "truncated": 0})
+            counters["calls"] += 1
+            counters["tokens"] += tokens
+            counters["truncated"] += int(truncated)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {purpose: dict(counters) for purpose, counters in self._purposes.items()}
+
+
+token_metrics = TokenMetrics()
+
+
+def fit_to_budget(text: str, purpose: str, max_tokens: Optional[int] = None, model: str = EMBEDDING_MODEL) -> str:
+    """Keep the head of `text` within `max_tokens` and the model's input limit."""
+    limit = MODEL_TOKEN_LIMITS.get(model)
+    if max_tokens is None or (limit is not None and limit < max_tokens):
+        max_tokens = limit
+    encoding = get_encoding(model)
+    tokens = encoding.encode(text, disallowed_special=())
+    truncated = max_tokens is not None and len(tokens) > max_tokens
+    if truncated:
+        logger.info("tokens_truncated", purpose=purpose, model=model, tokens=len(tokens), max_tokens=max_tokens)
+        tokens = tokens[:max_tokens]
+        text = encoding.decode(tokens)
+    token_metrics.record(purpose, len(tokens), truncated)
+    return text
+
+
+def chunk_text(text: str, max_tokens: int, overlap: int = 0, model: str = EMBEDDING_MODEL) -> List[tuple[str, int]]:
+    """Split `text` into windows of at most `max_tokens` tokens, each overlapping the previous by `overlap`."""
+    encoding = get_encoding(model)
+    tokens = encoding.encode(text, disallowed_special=())
+    step = max(max_tokens - overlap, 1)
+    chunks = []
+    for start in range(0, len(tokens), step):
+        window = tokens[start:start + max_tokens]
+        chunks.append((encoding.decode(window), len(window)))
+        if start + max_tokens >= len(tokens):
+            break
+    return chunks
@@ -1,17 +1,37 @@
 from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from contextlib import asynccontextmanager
 from app.routes import thoughts, chat, articles, webhooks, flow
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.logging import logger
 from app.core.limiter import limiter, rate_limits
 from app.utils.utils import parse_list_from_env
+from app.routes.utils import jwks_store, verified_tokens
+from app.llm_utils.embeddings.cache import embedding_cache
+from app.llm_utils.embeddings.embeddings import query_embedding_cache
+from app.llm_utils.tokens import token_metrics
+from app.database.database import AsyncSessionLocal
+from app.database.vector_search import VECTOR_STORAGE, missing_vector_indexes
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("application_startup", project_name="augment")
+    try:
+        await run_in_threadpool(jwks_store.refresh, True)
+    except Exception as e:
+        # Keys are fetched lazily on the first authenticated request instead
+        logger.error("application_startup_jwks_error", error=str(e))
+    try:
+        async with AsyncSessionLocal() as db:
+            missing = await missing_vector_indexes(db)
+        if missing:
+            # Searches still work, as sequential scans; see app.jobs.vector_storage_indexes
+            logger.error("application_startup_missing_vector_indexes", vector_storage=VECTOR_STORAGE, indexes=missing)
+    except Exception as e:
+        logger.error("application_startup_vector_index_check_error", error=str(e))
     yield
-    logger.info("application_shutdown", project_name="augment")
+    logger.info("application_shutdown", project_name="augment", verified_tokens=verified_tokens.stats(), embedding_cache=embedding_cache.stats(), query_embeddings=query_embedding_cache.stats(), tokens=token_metrics.stats())
 
 app = FastAPI(lifespan=lifespan)
 app.include_router(thoughts.router)
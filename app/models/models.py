@@ -1,11 +1,12 @@
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey, UniqueConstraint, ARRAY
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, UniqueConstraint, ARRAY, Integer, Index, Computed, text
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID, TIMESTAMP
 from sqlalchemy.dialects.postgresql import JSONB
-from pgvector.sqlalchemy import Vector
+from pgvector.sqlalchemy import Vector, HALFVEC
 from app.database.database import Base
+from app.core.config import EMBEDDING_DIMENSIONS
 from datetime import datetime, timezone
 import uuid
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 
 class User(Base):
     __tablename__ = "users"
@@ -43,9 +44,13 @@ class Thought(Base):
     text_content = Column(Text, nullable=False)
     image_url = Column(String, nullable=True)
     audio_url = Column(String, nullable=True)
-    embedding = Column(Vector(1536), nullable=False)
+    # NULL while the thought is still being enriched by the ingestion worker
+    embedding = Column(Vector(EMBEDDING_DIMENSIONS), nullable=True)
+    # Half precision mirror maintained by Postgres, read when VECTOR_STORAGE=halfvec
+    embedding_half = deferred(Column(HALFVEC(EMBEDDING_DIMENSIONS), Computed(f"embedding::halfvec({EMBEDDING_DIMENSIONS})", persisted=True)))
     full_content = Column(Text, nullable=False)
     meta = Column(JSONB, nullable=True)
+    status = Column(String, nullable=False, default="ready", server_default="ready")
     created_at = Column(TIMESTAMP(timezone=True), default=datetime.now(timezone.utc))
     updated_at = Column(TIMESTAMP(timezone=True), default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
     
@@ -72,7 +77,8 @@ class ExternalAritcle(Base):
     id = Column(PG_UUID(as_uuid=True), primary_key=True, default=lambda: uuid.uuid4())
     url = Column(String, unique=True, index=True, nullable=False)
     title = Column(String, nullable=True)
-    embedding = Column(Vector(1536), nullable=False)
+    embedding = Column(Vector(EMBEDDING_DIMENSIONS), nullable=False)
+    embedding_half = deferred(Column(HALFVEC(EMBEDDING_DIMENSIONS), Computed(f"embedding::halfvec({EMBEDDING_DIMENSIONS})", persisted=True)))
     authors = Column(ARRAY(String), nullable=True)
     text = Column(Text, nullable=False)
     tags = Column(ARRAY(String), nullable=True)
@@ -80,4 +86,71 @@ class ExternalAritcle(Base):
     source = Column(String, nullable=True)
     top_image_url = Column(String, nullable=True)
     published_at = Column(DateTime, nullable=True)
-    created_at = Column(TIMESTAMP(timezone=True), default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
\ No newline at end of file
+    created_at = Column(TIMESTAMP(timezone=True), default=datetime.now(timezone.utc), onupdate=datetime.now(timezone.utc))
+
+    chunks = relationship("ArticleChunk", back_populates="article", cascade="all, delete-orphan", passive_deletes=True)
+
+class ArticleChunk(Base):
+    __tablename__ = "article_chunks"
+    id = Column(PG_UUID(as_uuid=True), primary_key=True, default=lambda: uuid.uuid4())
+    article_id = Column(PG_UUID(as_uuid=True), ForeignKey("external_articles.id", ondelete="CASCADE"), index=True, nullable=False)
+    chunk_index = Column(Integer, nullable=False)
+    text = Column(Text, nullable=False)
+    token_count = Column(Integer, nullable=False)
+    embedding = Column(Vector(EMBEDDING_DIMENSIONS), nullable=False)
+
+    article = relationship("ExternalAritcle", back_populates="chunks")
+
+    __table_args__ = (UniqueConstraint(article_id, chunk_index, name="uix_article_id_chunk_index"),)
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+    id = Column(PG_UUID(as_uuid=True), primary_key=True, default=lambda: uuid.uuid4())
+    thought_id = Column(PG_UUID(as_uuid=True), ForeignKey("thoughts.id", ondelete="CASCADE"), index=True, nullable=False)
+    user_id = Column(PG_UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    status = Column(String, nullable=False, default="queued", server_default="queued")
+    payload = Column(JSONB, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    max_attempts = Column(Integer, nullable=False, default=3, server_default="3")
+    last_error = Column(Text, nullable=True)
+    run_after = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text("now()"))
+    locked_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text("now()"))
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text("now()"))
+    
+    __table_args__ = (
+        # Workers poll for queued jobs that are due
+        Index("ix_ingestion_jobs_queued", "run_after", postgresql_where=text("status = 'queued'")),
+    )
+
+
+class EmbeddingCacheEntry(Base):
+    __tablename__ = "embedding_cache"
+    # sha256 of model + text
+    key = Column(String(64), primary_key=True)
+    model = Column(String, nullable=False)
+    embedding = Column(Vector(), nullable=False)
+    created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text("now()"))
+    # Bumped at most daily on reads, expired rows are pruned by app.jobs.prune_embedding_cache
+    last_used_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text("now()"), index=True)
+
+
+class JobCheckpoint(Base):
+    __tablename__ = "job_checkpoints"
+    # e.g. "reembed:thoughts:embedding:text-embedding-3-small@1536"
+    name = Column(String, primary_key=True)
+    cursor = Column(String, nullable=True)
+    rows_done = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text("now()"))
+
+
+class UserProfile(Base):
+    __tablename__ = "user_profiles"
+    user_id = Column(PG_UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    # Running sum of the user's thought embeddings, discover uses sum / thought_count.
+    # Untyped width so app.jobs.resize_embeddings doesn't need to migrate it, reconcile instead.
+    embedding_sum = Column(Vector(), nullable=True)
+    thought_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Bumped on every change, invalidates discover cursors
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text("now()"))
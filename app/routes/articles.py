@@ -1,17 +1,21 @@
-from fastapi import APIRouter, Depends, Query, Request
+import uuid
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database.database import get_async_db
-from app.utils.ext_articles import scrape_article, to_pgvector
-from app.llm_utils.embeddings.embeddings import embed_text_openai
-from app.models.models import ExternalAritcle, Thought
+from app.utils.ext_articles import scrape_article
+from app.database import vector_search
+from app.database.profiles import get_user_vector
+from app.llm_utils.embeddings.embeddings import embed_query
+from app.llm_utils.embeddings.documents import embed_document
+from app.models.models import ArticleChunk, ExternalAritcle
 from app.llm_utils.tags import generate_article_tags
-import numpy as np
-from sqlalchemy import select
 from app.routes.utils import get_current_user
 from app.models.models import User
 from app.core.logging import logger
 from app.core.limiter import limiter, rate_limits
+from app.utils.utils import decode_cursor, encode_cursor
 
 router = APIRouter(prefix="/articles", tags=["articles"])
 
@@ -23,8 +27,8 @@ async def embed_article(request: Request, payload: dict, db: AsyncSession = Depe
         article = scrape_article(url)
         logger.info("embed_article_request_article", url=url)
         text = article["text"]
-        embedding = await embed_text_openai(text)
-        logger.info("embed_article_request_embedding", url=url, len_embedding=len(embedding))
+        chunks, embedding = await embed_document(text)
+        logger.info("embed_article_request_embedding", url=url, len_embedding=len(embedding), chunks=len(chunks))
         tags = generate_article_tags(text)
         logger.info("embed_article_request_tags", url=url, tags=tags)
         
@@ -43,6 +47,7 @@ async def embed_article(request: Request, payload: dict, db: AsyncSession = Depe
             top_image_url=article["top_image"],
             published_at=published_at,
             tags=tags,
+            chunks=[ArticleChunk(**chunk) for chunk in chunks],
         )
         db.add(new_article)
         await db.commit()
@@ -54,29 +59,29 @@ async def embed_article(request: Request, payload: dict, db: AsyncSession = Depe
 
 
 @router.get("/search")
-async def search_articles(request: Request, query: str, top_k: int = 5, db: AsyncSession = Depends(get_async_db), user: User = Depends(get_current_user)):
-    logger.info("search_articles_request", query=query, top_k=top_k)
+async def search_articles(request: Request, query: str, top_k: int = 5, mode: str = Query("document", pattern="^(document|passage)$"),
+    db: AsyncSession = Depends(get_async_db), user: User = Depends(get_current_user)):
+    logger.info("search_articles_request", query=query, top_k=top_k, mode=mode)
     try:
-        query_embedding = await embed_text_openai(query)
+        query_embedding = await embed_query(query)
         logger.info("search_articles_request_query_embedding", query=query, len_embedding=len(query_embedding))
-        sql = text("""
-            SELECT id, title, url, authors, embedding <#> (:embedding)::vector AS distance
-            FROM external_articles
-            ORDER BY embedding <#> (:embedding)::vector
-            LIMIT :top_k
-        """)
-        result = await db.execute(sql, {"embedding": to_pgvector(query_embedding), "top_k": top_k})
-        result = result.all()
+        if mode == "passage":
+            result = await vector_search.search_article_passages(db, query_embedding, top_k)
+        else:
+            result = await vector_search.search_articles(db, query_embedding, top_k)
         articles = []
         for row in result:
-            articles.append({
+            article = {
                 "id": row[0],
                 "title": row[1],
                 "url": row[2],
                 "authors": row[3],
                 "distance": row[4],
-            })
-        logger.info("search_articles_request_return", query=query, top_k=top_k, len_articles=len(articles))
+            }
+            if mode == "passage":
+                article["passage"] = {"index": row[5], "text": row[6]}
+            articles.append(article)
+        logger.info("search_articles_request_return", query=query, top_k=top_k, mode=mode, len_articles=len(articles))
         return {"results": articles}
     except Exception as e:
         logger.error("search_articles_request_error", query=query, error=str(e))
@@ -86,25 +91,33 @@ async def search_articles(request: Request, query: str, top_k: int = 5, db: Asyn
 @router.get("/discover")
 @limiter.limit(rate_limits["RATE_LIMIT_DISCOVER_ARTICLES"][0])
 async def discover_articles(request: Request, db: AsyncSession = Depends(get_async_db), limit: int = Query(10, ge=1, le=50),
-    offset: int = Query(0, ge=0), user: User = Depends(get_current_user)):
-    logger.info("discover_articles_request", limit=limit, offset=offset)
+    offset: int = Query(0, ge=0, le=vector_search.DISCOVER_MAX_DEPTH), cursor: Optional[str] = Query(None), user: User = Depends(get_current_user)):
+    logger.info("discover_articles_request", limit=limit, offset=offset, cursor=cursor is not None)
+    after, served, cursor_version = None, offset, None
+    if cursor:
+        try:
+            state = decode_cursor(cursor)
+            after = (float(state["d"]), str(uuid.UUID(state["id"])))
+            served, cursor_version = int(state["n"]), state["v"]
+            # Cursors are unsigned, `n` sizes the index scan
+            if not 0 <= served <= vector_search.DISCOVER_MAX_DEPTH:
+                raise ValueError("Cursor out of range")
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
     try:
-        thoughts = await db.execute(select(Thought.embedding).where(Thought.user_id == user.id))
-        embeddings = [row[0] for row in thoughts.fetchall()]
-        if not embeddings:
+        profile = await get_user_vector(db, user.id)
+        if profile is None:
             logger.info("discover_articles_request_no_embeddings", limit=limit, offset=offset)
-            return {"articles": []}
-        user_vector = np.mean(np.array(embeddings), axis=0)
+            return {"articles": [], "next_cursor": None, "reset": False}
+        user_vector, version = profile
         logger.info("discover_articles_request_user_vector", limit=limit, offset=offset, len_user_vector=len(user_vector))
-        sql = text("""
-            SELECT id, title, text, authors, top_image_url, tags, url, published_at, embedding <#> (:embedding)::vector AS distance
-            FROM external_articles
-            ORDER BY embedding <#> (:embedding)::vector
-            LIMIT :limit
-            OFFSET :offset
-        """)
-        results = await db.execute(sql, {"embedding": to_pgvector(user_vector), "limit": limit, "offset": offset})
-        results = results.all()
+
+        reset = after is not None and cursor_version != version
+        if reset:
+            # The ranking the cursor points into no longer exists, start again from the top
+            logger.info("discover_articles_request_cursor_reset", limit=limit)
+            after, served = None, 0
+        results = await vector_search.discover_articles(db, user_vector, limit, offset=0 if cursor else offset, after=after, served=served)
         logger.info("discover_articles_request_results", limit=limit, offset=offset, len_results=len(results))
         articles = []
         for row in results:
@@ -119,8 +132,12 @@ async def discover_articles(request: Request, db: AsyncSession = Depends(get_asy
                 "publishedDate": row[7].strftime("%Y-%m-%d") if row[7] else None,
                 "distance": row[8],
             })
+        next_cursor = None
+        if len(results) == limit and served + len(results) <= vector_search.DISCOVER_MAX_DEPTH:
+            last = results[-1]
+            next_cursor = encode_cursor({"d": last[8], "id": str(last[0]), "v": version, "n": served + len(results)})
         logger.info("discover_articles_request_return", limit=limit, offset=offset, len_articles=len(articles))
-        return {"articles": articles}
+        return {"articles": articles, "next_cursor": next_cursor, "reset": reset}
     except Exception as e:
         logger.error("discover_articles_request_error", limit=limit, offset=offset, error=str(e))
-        return {"message": "Failed to discover articles"}
\ No newline at end of file
+        return {"message": "Failed to discover articles"}
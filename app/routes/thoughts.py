@@ -1,21 +1,31 @@
+import asyncio
+import json
+import os
 import uuid
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from app.models.models import Thought, Tag, User
 
-from app.schemas.schemas import  ThoughtResponse, VisualizeThought, VisualizeThoughtResponse, ThoughtResponseFull   
+from app.schemas.schemas import  ThoughtResponse, VisualizeThought, VisualizeThoughtResponse, ThoughtResponseFull, ThoughtStatusResponse, BulkThoughtResponse
 
-from app.database.database import get_db
+from app.database.database import get_async_db, AsyncSessionLocal
+from app.database.ingestion import enqueue_ingestion_job, get_ingestion_error
+from app.database.profiles import apply_profile_delta
 
-from app.llm_utils.embeddings.embeddings import embed_text_openai
+from app.llm_utils.embeddings.embeddings import embed_text, embed_texts
 from app.llm_utils.embeddings.image_utils import get_image_description
 from app.llm_utils.embeddings.audio_utils import get_audio_transcript
-from app.database.tags import assign_tags_to_thought
+from app.database.tags import assign_tags_to_thought, bulk_assign_tags
+from app.llm_utils.enrichment import enrich_thought
 
-from app.utils.aws_utils import upload_file_to_s3, generate_presigned_url
+from app.utils.aws_utils import upload_file_to_s3, generate_presigned_urls
 from app.llm_utils.tags import generate_tags_and_title
 from app.routes.utils import get_current_user
 from app.core.logging import logger
@@ -28,6 +38,23 @@ from app.core.limiter import limiter, rate_limits
 
 router = APIRouter(prefix="/thoughts", tags=["thoughts"])
 
+THOUGHT_STATUS_STREAM_INTERVAL = float(os.getenv("THOUGHT_STATUS_STREAM_INTERVAL", "1"))
+THOUGHT_STATUS_STREAM_MAX_POLLS = int(os.getenv("THOUGHT_STATUS_STREAM_MAX_POLLS", "300"))
+THOUGHTS_BULK_MAX_ITEMS = int(os.getenv("THOUGHTS_BULK_MAX_ITEMS", "1000"))
+THOUGHTS_BULK_TAG_CONCURRENCY = int(os.getenv("THOUGHTS_BULK_TAG_CONCURRENCY", "8"))
+
+
+def _cluster_embeddings(embeddings: np.ndarray, n_components: int, n_clusters: int):
+    # UMAP Dimensionality Reduction
+    desired_n_neighbors = max(10, int(len(embeddings) * 0.05))
+    n_neighbors = min(len(embeddings) - 1, desired_n_neighbors)
+    reducer = umap.UMAP(n_components=n_components, n_neighbors=n_neighbors, n_jobs=1)
+    reduced = reducer.fit_transform(embeddings)
+    
+    kemans = KMeans(n_clusters=n_clusters)
+    labels = kemans.fit_predict(reduced)
+    return reduced, labels
+
 @router.post("/create", response_model=ThoughtResponse)
 @limiter.limit(rate_limits["RATE_LIMIT_THOUGHTS_CREATE"][0])
 async def create_thought(
@@ -36,39 +63,24 @@ async def create_thought(
     image: Optional[UploadFile] = File(None),
     audio: Optional[UploadFile] = File(None),
     metadata: Optional[str] = Form(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user)
 ):
     logger.info("create_thought_request", user_id=user.id)
     thought_id = str(uuid.uuid4())
     user_id = user.id
     file_path = f"user_{user_id}/thoughts/{thought_id}"
-    image_url = None
-    audio_url = None
-    full_content = ""
     
     try:
-        if text:
-            full_content += f"<Thought>: {text} </Thought>"
-        logger.info("create_thought_request_text", user_id=user.id)
-        if image:
-            image_bytes = await image.read()
-            image_url = upload_file_to_s3(f"{file_path}/image.png", image_bytes)
-            image_description = get_image_description(f"{file_path}/image.png", full_content)
-            full_content += f"\n\n<Image>: {image_description} </Image>"
-            logger.info("create_thought_request_image", user_id=user.id, image_url=image_url)
-        
-        if audio:
-            audio_bytes = await audio.read()
-            audio_url = upload_file_to_s3(f"{file_path}/audio.mp3", audio_bytes)
-            audio_description = get_audio_transcript(f"{file_path}/audio.mp3")
-            full_content += f"\n\n<Audio>: {audio_description} </Audio>"
-            logger.info("create_thought_request_audio", user_id=user.id, audio_url=audio_url)
-        embedding = await embed_text_openai(full_content)
-        logger.info("create_thought_request_embedding", user_id=user.id, len_embedding=len(embedding))
-        tags = db.query(Tag).filter(Tag.user_id == user_id).all()
-        title, tags = generate_tags_and_title(full_content, tags)
-        logger.info("create_thought_request_tags", user_id=user.id)
+        image_bytes = await image.read() if image else None
+        audio_bytes = await audio.read() if audio else None
+        # Independent stages (media branches, embedding vs tagging) run concurrently
+        enrichment = await enrich_thought(db, user_id, file_path, text=text, image_bytes=image_bytes, audio_bytes=audio_bytes)
+        full_content = enrichment["full_content"]
+        embedding = enrichment["embedding"]
+        title, tags = enrichment["title"], enrichment["tags"]
+        image_url, audio_url = enrichment["image_url"], enrichment["audio_url"]
+        logger.info("create_thought_request_enrichment", user_id=user.id, image_url=image_url, audio_url=audio_url, len_embedding=len(embedding))
         new_thought = Thought(
             id = thought_id,
             user_id = user_id,
@@ -82,12 +94,13 @@ async def create_thought(
         )
         logger.info("create_thought_request_new_thought", user_id=user.id)
         db.add(new_thought)
-        db.flush()
+        await db.flush()
+        await apply_profile_delta(db, user_id, added=[embedding])
         
-        assign_tags_to_thought(db, user_id, new_thought.id, tags)
+        await assign_tags_to_thought(db, user_id, new_thought.id, tags)
         logger.info("create_thought_request_assign_tags", user_id=user.id)
-        db.commit()
-        db.refresh(new_thought)
+        await db.commit()
+        await db.refresh(new_thought)
         logger.info("create_thought_request_commit", user_id=user.id)
     except Exception as e:
         logger.error("create_thought_request_error", user_id=user.id, error=str(e))
@@ -97,11 +110,187 @@ async def create_thought(
     return ThoughtResponse(id=thought_id, created_at=str(new_thought.created_at))
 
 
+def _parse_bulk_thoughts(body: bytes, content_type: str) -> list[dict]:
+    """Accept a JSON array (or {"thoughts": [...]}) or NDJSON, of strings or {"text", "metadata"} objects."""
+    if "ndjson" in content_type or "jsonl" in content_type:
+        items = [json.loads(line) for line in body.decode().splitlines() if line.strip()]
+    else:
+        items = json.loads(body)
+        if isinstance(items, dict):
+            items = items.get("thoughts")
+    if not isinstance(items, list):
+        raise ValueError("Expected a list of thoughts")
+    
+    thoughts = []
+    for index, item in enumerate(items):
+        if isinstance(item, str):
+            item = {"text": item}
+        if not isinstance(item, dict) or not isinstance(item.get("text"), str) or not item["text"].strip():
+            raise ValueError(f"Thought {index} has no text")
+        thoughts.append({"text": item["text"].strip(), "metadata": item.get("metadata")})
+    return thoughts
+
+
+@router.post("/bulk", response_model=BulkThoughtResponse)
+@limiter.limit(rate_limits["RATE_LIMIT_THOUGHTS_BULK"][0])
+async def bulk_create_thoughts(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user)
+):
+    logger.info("bulk_create_thoughts_request", user_id=user.id)
+    user_id = user.id
+    try:
+        items = _parse_bulk_thoughts(await request.body(), request.headers.get("content-type", ""))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not items:
+        raise HTTPException(status_code=400, detail="No thoughts provided")
+    if len(items) > THOUGHTS_BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {THOUGHTS_BULK_MAX_ITEMS} thoughts per request")
+    
+    try:
+        full_contents = [f"<Thought>: {item['text']} </Thought>" for item in items]
+        existing_tags = await db.execute(select(Tag.name).where(Tag.user_id == user_id))
+        existing_tags = existing_tags.scalars().all()
+        semaphore = asyncio.Semaphore(THOUGHTS_BULK_TAG_CONCURRENCY)
+        
+        async def tags_and_title(full_content: str):
+            async with semaphore:
+                try:
+                    return await generate_tags_and_title(full_content, existing_tags)
+                except Exception as e:
+                    # An untagged thought is better than failing the whole import
+                    logger.error("bulk_create_thoughts_request_tags_error", user_id=user_id, error=str(e))
+                    return None, []
+        
+        embeddings, tagged = await asyncio.gather(
+            embed_texts(full_contents),
+            asyncio.gather(*[tags_and_title(full_content) for full_content in full_contents]),
+        )
+        logger.info("bulk_create_thoughts_request_enrichment", user_id=user_id, count=len(items))
+        
+        rows = []
+        tags_by_thought = {}
+        for item, full_content, embedding, (title, tags) in zip(items, full_contents, embeddings, tagged):
+            thought_id = uuid.uuid4()
+            rows.append({
+                "id": thought_id,
+                "user_id": user_id,
+                "title": title,
+                "text_content": item["text"],
+                "embedding": embedding,
+                "full_content": full_content,
+                "meta": item["metadata"],
+            })
+            tags_by_thought[thought_id] = tags
+        
+        await db.execute(insert(Thought), rows)
+        await apply_profile_delta(db, user_id, added=embeddings)
+        await bulk_assign_tags(db, user_id, tags_by_thought)
+        await db.commit()
+    except Exception as e:
+        logger.error("bulk_create_thoughts_request_error", user_id=user_id, error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    logger.info("bulk_create_thoughts_request_return", user_id=user_id, count=len(rows))
+    return BulkThoughtResponse(ids=[str(row["id"]) for row in rows], count=len(rows))
+
+
+@router.post("/ingest", response_model=ThoughtStatusResponse, status_code=202)
+@limiter.limit(rate_limits["RATE_LIMIT_THOUGHTS_CREATE"][0])
+async def ingest_thought(
+    request: Request,
+    text: Optional[str] = Form(None),
+    image: Optional[UploadFile] = File(None),
+    audio: Optional[UploadFile] = File(None),
+    metadata: Optional[str] = Form(None),
+    db: AsyncSession = Depends(get_async_db),
+    user: User = Depends(get_current_user)
+):
+    """Store a pending thought and leave the enrichment to the ingestion worker."""
+    logger.info("ingest_thought_request", user_id=user.id)
+    thought_id = str(uuid.uuid4())
+    user_id = user.id
+    file_path = f"user_{user_id}/thoughts/{thought_id}"
+    
+    try:
+        image_bytes = await image.read() if image else None
+        audio_bytes = await audio.read() if audio else None
+        image_url, audio_url = await asyncio.gather(
+            upload_file_to_s3(f"{file_path}/image.png", image_bytes) if image_bytes else asyncio.sleep(0),
+            upload_file_to_s3(f"{file_path}/audio.mp3", audio_bytes) if audio_bytes else asyncio.sleep(0),
+        )
+        new_thought = Thought(
+            id = thought_id,
+            user_id = user_id,
+            text_content = text or "",
+            image_url = image_url,
+            audio_url = audio_url,
+            full_content = f"<Thought>: {text} </Thought>" if text else "",
+            meta = metadata,
+            status = "pending"
+        )
+        db.add(new_thought)
+        await db.flush()
+        await enqueue_ingestion_job(db, thought_id, user_id, {"file_path": file_path, "text": text})
+        await db.commit()
+    except Exception as e:
+        logger.error("ingest_thought_request_error", user_id=user.id, error=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    logger.info("ingest_thought_request_return", user_id=user.id, thought_id=thought_id)
+    return ThoughtStatusResponse(id=thought_id, status="pending")
+
+
+async def _get_thought_status(db: AsyncSession, thought_id: str, user_id) -> Optional[ThoughtStatusResponse]:
+    result = await db.execute(select(Thought.status).where(Thought.id == thought_id, Thought.user_id == user_id))
+    status = result.scalar_one_or_none()
+    if status is None:
+        return None
+    error = await get_ingestion_error(db, thought_id) if status == "failed" else None
+    return ThoughtStatusResponse(id=thought_id, status=status, error=error)
+
+
+@router.get("/{thought_id}/status", response_model=ThoughtStatusResponse)
+@limiter.limit(rate_limits["RATE_LIMIT_THOUGHTS_READ"][0])
+async def get_thought_status(request: Request, thought_id: str, db: AsyncSession = Depends(get_async_db), user: User = Depends(get_current_user)):
+    status = await _get_thought_status(db, thought_id, user.id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Thought not found")
+    return status
+
+
+@router.get("/{thought_id}/status/stream")
+@limiter.limit(rate_limits["RATE_LIMIT_THOUGHTS_READ"][0])
+async def stream_thought_status(request: Request, thought_id: str, user: User = Depends(get_current_user)):
+    """Server-sent events with the thought status until it is ready or failed."""
+    user_id = user.id
+    
+    async def stream_status():
+        last = None
+        for _ in range(THOUGHT_STATUS_STREAM_MAX_POLLS):
+            # Short-lived sessions so an open stream doesn't pin a pooled connection
+            async with AsyncSessionLocal() as db:
+                status = await _get_thought_status(db, thought_id, user_id)
+            if status is None:
+                yield f"event: error\ndata: {json.dumps({'detail': 'Thought not found'})}\n\n"
+                return
+            if status.status != last:
+                yield f"data: {status.model_dump_json()}\n\n"
+                last = status.status
+            if status.status in ("ready", "failed") or await request.is_disconnected():
+                return
+            await asyncio.sleep(THOUGHT_STATUS_STREAM_INTERVAL)
+    
+    return StreamingResponse(stream_status(), media_type="text/event-stream")
+
+
 @router.get("/visualize", response_model=VisualizeThoughtResponse)
 @limiter.limit(rate_limits["RATE_LIMIT_THOUGHTS_READ"][0])
 async def get_clustered_thoughts(
     request: Request,
-    db: Session = Depends(get_db), 
+    db: AsyncSession = Depends(get_async_db), 
     n_components: int = 3, 
     n_clusters: int = 5, 
     user: User = Depends(get_current_user)
@@ -109,7 +298,9 @@ async def get_clustered_thoughts(
     logger.info("get_clustered_thoughts_request",  user_id=user.id)
     user_id = user.id
     try:
-        thoughts = db.query(Thought).filter(Thought.user_id == user_id).all()
+        # Thoughts still being ingested have no embedding yet
+        thoughts = await db.execute(select(Thought).where(Thought.user_id == user_id, Thought.embedding.isnot(None)))
+        thoughts = thoughts.scalars().all()
         logger.info("get_clustered_thoughts_request_thoughts", user_id=user.id, len_thoughts=len(thoughts))
         if not thoughts:
             logger.error("get_clustered_thoughts_request_no_thoughts", user_id=user.id)
@@ -132,15 +323,8 @@ async def get_clustered_thoughts(
         
         embeddings = np.array([t.embedding for t in thoughts])
         
-        # UMAP Dimensionality Reduction
-        desired_n_neighbors = max(10, int(len(embeddings) * 0.05))
-        n_neighbors = min(len(embeddings) - 1, desired_n_neighbors)
-        logger.info("get_clustered_thoughts_request_n_neighbors", user_id=user.id, n_neighbors=n_neighbors)
-        reducer = umap.UMAP(n_components=n_components, n_neighbors=n_neighbors, n_jobs=1)
-        reduced = reducer.fit_transform(embeddings)
-        
-        kemans = KMeans(n_clusters=n_clusters)
-        labels = kemans.fit_predict(reduced)
+        # UMAP + KMeans are CPU bound, keep them off the event loop
+        reduced, labels = await run_in_threadpool(_cluster_embeddings, embeddings, n_components, n_clusters)
         logger.info("get_clustered_thoughts_request_labels", user_id=user.id)
         # Create response
         response = []
@@ -162,25 +346,28 @@ async def get_clustered_thoughts(
     
 @router.get("/{thought_id}", response_model=ThoughtResponseFull)
 @limiter.limit(rate_limits["RATE_LIMIT_THOUGHTS_READ"][0])
-async def get_thought(request: Request, thought_id: str, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+async def get_thought(request: Request, thought_id: str, db: AsyncSession = Depends(get_async_db), user: User = Depends(get_current_user)):
     logger.info("get_thought_request", user_id=user.id, thought_id=thought_id)
     user_id = user.id
-    thought = db.query(Thought).filter(Thought.id == thought_id, Thought.user_id == user_id).first()
+    thought = await db.execute(select(Thought).where(Thought.id == thought_id, Thought.user_id == user_id))
+    thought = thought.scalar_one_or_none()
     logger.info("get_thought_request_thought", user_id=user.id)
     if not thought:
         logger.error("get_thought_request_thought_not_found", user_id=user.id, thought_id=thought_id)
         raise HTTPException(status_code=404, detail="Thought not found")
 
+    image_url, audio_url = await generate_presigned_urls([thought.image_url, thought.audio_url])
     logger.info("get_thought_request_return", user_id=user.id)
     return ThoughtResponseFull(
         id = str(thought.id),
         title = thought.title,
         text_content = thought.text_content,
-        image_url = generate_presigned_url(thought.image_url) if thought.image_url else None,
-        audio_url = generate_presigned_url(thought.audio_url) if thought.audio_url else None,
+        image_url = image_url,
+        audio_url = audio_url,
         full_content = thought.full_content,
         created_at = str(thought.created_at),
-        updated_at = str(thought.updated_at)
+        updated_at = str(thought.updated_at),
+        status = thought.status
     )
     
 @router.put("/{thought_id}", response_model=ThoughtResponse)
@@ -192,12 +379,13 @@ async def update_thought(
     text_content: str = Form(...),
     image: Optional[UploadFile] = File(None),
     audio: Optional[UploadFile] = File(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user)
 ):
     logger.info("update_thought_request", user_id=user.id, thought_id=thought_id)
     user_id = user.id
-    thought = db.query(Thought).filter(Thought.id == thought_id, Thought.user_id == user_id).first()
+    thought = await db.execute(select(Thought).where(Thought.id == thought_id, Thought.user_id == user_id))
+    thought = thought.scalar_one_or_none()
 
     if not thought:
         logger.error("update_thought_request_thought_not_found", user_id=user.id, thought_id=thought_id)
@@ -217,8 +405,10 @@ async def update_thought(
         # Handle image
         if image:
             image_bytes = await image.read()
-            image_url = upload_file_to_s3(f"{file_path}/image.png", image_bytes)
-            image_description = get_image_description(f"{file_path}/image.png", full_content)
+            image_url, image_description = await asyncio.gather(
+                upload_file_to_s3(f"{file_path}/image.png", image_bytes),
+                get_image_description(image_bytes, full_content),
+            )
 
             if re.search(r"<Image>.*?</Image>", full_content, re.DOTALL):
                 full_content = re.sub(r"<Image>.*?</Image>", f"<Image>{image_description}</Image>", full_content, flags=re.DOTALL)
@@ -230,8 +420,10 @@ async def update_thought(
         # Handle audio
         if audio:
             audio_bytes = await audio.read()
-            audio_url = upload_file_to_s3(f"{file_path}/audio.mp3", audio_bytes)
-            audio_description = get_audio_transcript(f"{file_path}/audio.mp3")
+            audio_url, audio_description = await asyncio.gather(
+                upload_file_to_s3(f"{file_path}/audio.mp3", audio_bytes),
+                get_audio_transcript(audio_bytes, f"{file_path}/audio.mp3"),
+            )
 
             if re.search(r"<Audio>.*?</Audio>", full_content, re.DOTALL):
                 full_content = re.sub(r"<Audio>.*?</Audio>", f"<Audio>{audio_description}</Audio>", full_content, flags=re.DOTALL)
@@ -244,15 +436,18 @@ async def update_thought(
         thought.title = title
         thought.text_content = text_content
         thought.full_content = full_content
-        thought.embedding = await embed_text_openai(full_content)
+        previous_embedding = thought.embedding
+        thought.embedding = await embed_text(full_content)
+        await db.flush()
+        await apply_profile_delta(db, user_id, added=[thought.embedding], removed=[previous_embedding])
 
         # Tag generation and assignment
-        tags = db.query(Tag).filter(Tag.user_id == user_id).all()
-        _, tags = generate_tags_and_title(full_content, tags)
-        assign_tags_to_thought(db, user_id, thought.id, tags)
+        tags = await db.execute(select(Tag.name).where(Tag.user_id == user_id))
+        _, tags = await generate_tags_and_title(full_content, tags.scalars().all())
+        await assign_tags_to_thought(db, user_id, thought.id, tags)
 
-        db.commit()
-        db.refresh(thought)
+        await db.commit()
+        await db.refresh(thought)
         logger.info("update_thought_request_return", user_id=user.id, thought_id=thought_id)
         return ThoughtResponse(id=str(thought.id), created_at=str(thought.created_at))
 
@@ -263,18 +458,25 @@ async def update_thought(
 
 @router.delete("/{thought_id}")
 @limiter.limit(rate_limits["RATE_LIMIT_THOUGHTS_DELETE"][0])
-async def delete_thought(request: Request, thought_id: str, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+async def delete_thought(request: Request, thought_id: str, db: AsyncSession = Depends(get_async_db), user: User = Depends(get_current_user)):
     logger.info("delete_thought_request", user_id=user.id, thought_id=thought_id)
     try:
         user_id = user.id
-        thought = db.query(Thought).filter(Thought.id == thought_id, Thought.user_id == user_id).first()
+        # tags are loaded up front so the thought_tags rows can be removed without a lazy load
+        thought = await db.execute(
+            select(Thought).options(selectinload(Thought.tags)).where(Thought.id == thought_id, Thought.user_id == user_id)
+        )
+        thought = thought.scalar_one_or_none()
         logger.info("delete_thought_request_thought", user_id=user.id)
         if not thought:
             logger.error("delete_thought_request_thought_not_found", user_id=user.id, thought_id=thought_id)
             raise HTTPException(status_code=404, detail="Thought not found")
             
-        db.delete(thought)
-        db.commit()
+        removed_embedding = thought.embedding
+        await db.delete(thought)
+        await db.flush()
+        await apply_profile_delta(db, user_id, removed=[removed_embedding])
+        await db.commit()
         logger.info("delete_thought_request_return", user_id=user.id, thought_id=thought_id)
         return {"message": "Thought deleted successfully"}
     except Exception as e:
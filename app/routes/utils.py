@@ -1,15 +1,17 @@
-import requests
 import jwt
-import base64
-from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicNumbers
-from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives import serialization
 import os
+import hashlib
+from typing import Optional
 from fastapi import Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
-from app.database.database import get_db
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.database import get_async_db
 from app.models.models import User
+from app.core.jwks import JWKSKeyStore, JWKSError
+from app.core.cache import LRUCache
 
 from dotenv import load_dotenv
 
@@ -21,33 +23,57 @@ auth_scheme = HTTPBearer()
 
 CLERK_JWKS_URL = os.getenv("CLERK_JWKS_URL")
 CLERK_SECRET_KEY = os.getenv("CLERK_SECRET_KEY")
+CLERK_JWKS_TTL_SECONDS = float(os.getenv("CLERK_JWKS_TTL_SECONDS", "3600"))
+VERIFIED_TOKEN_CACHE_SIZE = int(os.getenv("VERIFIED_TOKEN_CACHE_SIZE", "10000"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+# Webhooks only reach one worker, the TTL bounds staleness on the others
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "300"))
+
+jwks_store = JWKSKeyStore(
+    CLERK_JWKS_URL,
+    headers={"Authorization": f"Bearer {CLERK_SECRET_KEY}"},
+    ttl_seconds=CLERK_JWKS_TTL_SECONDS,
+)
+
+# sha256(token) -> (user_id, payload), held until the token's exp
+verified_tokens = LRUCache("verified_tokens", max_size=VERIFIED_TOKEN_CACHE_SIZE)
+# external_id -> detached User
+user_cache = LRUCache("users", max_size=USER_CACHE_SIZE, ttl_seconds=USER_CACHE_TTL_SECONDS)
 
 class AuthenticationException(Exception):
     pass
 
-def validate_token(auth_header: str) -> tuple[str, dict]:
+def token_cache_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def validate_token(auth_header: str, token_hash: Optional[str] = None) -> tuple[str, dict]:
+    """Pass `token_hash` when verified_tokens was already checked, so a miss is only counted once."""
     try:
         token = auth_header
     except (AttributeError, IndexError):
         raise AuthenticationException("No authentication token provided")
-    jwks = requests.get(CLERK_JWKS_URL, headers={"Authorization": f"Bearer {CLERK_SECRET_KEY}"}).json()
-    if "keys" not in jwks or not jwks["keys"]:
-        raise AuthenticationException("Invalid JWKS")
-    key = jwks["keys"][0]
-    numbers = RSAPublicNumbers(
-        e=int.from_bytes(base64.urlsafe_b64decode(key["e"] + "=" * (-len(key["e"]) % 4)), "big"),
-        n=int.from_bytes(base64.urlsafe_b64decode(key["n"] + "=" * (-len(key["n"]) % 4)), "big")
-    )
-    public_key = numbers.public_key(backend=default_backend())
-    pem = public_key.public_bytes(
-        encoding=serialization.Encoding.PEM,
-        format=serialization.PublicFormat.SubjectPublicKeyInfo
-    )
+    
+    if token_hash is None:
+        token_hash = token_cache_key(token)
+        cached = verified_tokens.get(token_hash)
+        if cached is not None:
+            return cached
+    
+    try:
+        kid = jwt.get_unverified_header(token).get("kid")
+        public_key = jwks_store.get_key(kid)
+    except jwt.DecodeError:
+        raise AuthenticationException("Token decode error.")
+    except JWKSError as e:
+        raise AuthenticationException(str(e))
+    except Exception as e:
+        raise AuthenticationException(f"Failed to load JWKS: {str(e)}")
     
     try:
         payload = jwt.decode(
             token,
-            pem,
+            public_key,
             algorithms=["RS256"],
             options={"verify_signature": True}
         )
@@ -62,36 +88,69 @@ def validate_token(auth_header: str) -> tuple[str, dict]:
     if not user_id:
         raise AuthenticationException("Token does not contain a user ID")
     
+    exp = payload.get("exp")
+    if exp is not None:
+        verified_tokens.set(token_hash, (user_id, payload), expires_at=float(exp))
+    
     return user_id, payload
 
-def get_current_user(
+async def _get_or_create_user(db: AsyncSession, clerk_user_id: str, payload: dict) -> User:
+    result = await db.execute(select(User).where(User.external_id == clerk_user_id))
+    user = result.scalar_one_or_none()
+    if user:
+        return user
+    
+    # Extract user data from JWT payload
+    email = payload.get("email", "")
+    first_name = payload.get("first_name", "")
+    last_name = payload.get("last_name", "")
+    profile_image_url = payload.get("picture", "")
+    name = f"{first_name} {last_name}".strip() or email
+    
+    # Concurrent first requests (or the Clerk webhook) may create the same user
+    stmt = pg_insert(User).values(
+        external_id=clerk_user_id,
+        email=email,
+        name=name,
+        profile_image_url=profile_image_url,
+        first_name=first_name,
+        last_name=last_name
+    ).on_conflict_do_nothing(index_elements=[User.external_id]).returning(User)
+    result = await db.scalars(stmt)
+    user = result.one_or_none()
+    await db.commit()
+    
+    if not user:
+        result = await db.execute(select(User).where(User.external_id == clerk_user_id))
+        user = result.scalar_one()
+    return user
+
+
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(auth_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
+    token = credentials.credentials
     try:
-        clerk_user_id, payload = validate_token(credentials.credentials)
+        # Cached tokens skip the threadpool hop, cold JWKS fetches and RSA checks don't block the loop
+        token_hash = token_cache_key(token)
+        validated = verified_tokens.get(token_hash)
+        if validated is None:
+            validated = await run_in_threadpool(validate_token, token, token_hash)
+        clerk_user_id, payload = validated
     except AuthenticationException as e:
         raise HTTPException(status_code=401, detail=str(e))
     
-    user = db.query(User).filter(User.external_id == clerk_user_id).first()
+    user = user_cache.get(clerk_user_id)
+    if user is not None:
+        return user
     
-    if not user:
-        # Extract user data from JWT payload
-        email = payload.get("email", "")
-        first_name = payload.get("first_name", "")
-        last_name = payload.get("last_name", "")
-        profile_image_url = payload.get("picture", "")
-        name = f"{first_name} {last_name}".strip() or email
-        
-        user = User(
-            external_id=clerk_user_id,
-            email=email,
-            name=name,
-            profile_image_url=profile_image_url,
-            first_name=first_name,
-            last_name=last_name
-        )
-        db.add(user)
-        db.commit()
-    
-    return user
\ No newline at end of file
+    user = await _get_or_create_user(db, clerk_user_id, payload)
+    # Detach so the cached instance is never refreshed through another request's session
+    db.expunge(user)
+    user_cache.set(clerk_user_id, user)
+    return user
+
+
+def invalidate_user(external_id: str) -> None:
+    user_cache.delete(external_id)
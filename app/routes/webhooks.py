@@ -6,6 +6,7 @@ from svix.webhooks import Webhook, WebhookVerificationError
 import os
 from app.core.logging import logger
 from app.core.limiter import limiter, rate_limits
+from app.routes.utils import invalidate_user
 
 router = APIRouter(prefix="/webhooks", tags=["webhooks"])
 
@@ -64,6 +65,7 @@ async def clerk_auth(request: Request, db: Session = Depends(get_db)):
                 user.last_name = last
                 user.profile_image_url = profile_image_url
             db.commit()
+            invalidate_user(external_id)
             logger.info("clerk_auth_request_return", user_id=user.id)
             return {"message": f"User {event_type} synced successfully"}
 
@@ -72,6 +74,7 @@ async def clerk_auth(request: Request, db: Session = Depends(get_db)):
             if user:
                 db.delete(user)
                 db.commit()
+            invalidate_user(external_id)
             return {"message": "User deleted successfully"}
         logger.info("clerk_auth_request_return", user_id=user.id)
         return {"message": f"Ignored unsupported event type: {event_type}"}
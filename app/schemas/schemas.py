@@ -12,6 +12,15 @@ class ThoughtResponse(BaseModel):
     id: str
     created_at: str
 
+class BulkThoughtResponse(BaseModel):
+    ids: list[str]
+    count: int
+
+class ThoughtStatusResponse(BaseModel):
+    id: str
+    status: str
+    error: Optional[str] = None
+
 
 class VisualizeThought(BaseModel):
     id: str
@@ -32,4 +41,5 @@ class ThoughtResponseFull(BaseModel):
     audio_url: Optional[str]
     full_content: str
     created_at: str
-    updated_at: str
\ No newline at end of file
+    updated_at: str
+    status: str = "ready"
\ No newline at end of file
@@ -1,43 +1,118 @@
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
+
 import boto3
+from botocore.config import Config
 from botocore.exceptions import BotoCoreError, NoCredentialsError
 import os
 from dotenv import load_dotenv
 import logging
 
+from app.core.cache import LRUCache
+
 logger = logging.getLogger(__name__)
 load_dotenv()
 
-s3_client = boto3.client(
-    "s3",
-    aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-    aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-    region_name=os.getenv("AWS_REGION"),
-)
-
 BUCKET_NAME = os.getenv("S3_BUCKET_NAME")
+# Shared by the executor threads, boto3 clients are thread safe
+S3_MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", "16"))
+# Set to a local stand-in (moto server, minio) for tests
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")
+S3_PRESIGN_EXPIRES_IN = int(os.getenv("S3_PRESIGN_EXPIRES_IN", "3600"))
+# Cached URLs are handed out until this many seconds before they expire
+S3_PRESIGN_SAFETY_MARGIN = int(os.getenv("S3_PRESIGN_SAFETY_MARGIN", "300"))
+S3_PRESIGN_CACHE_SIZE = int(os.getenv("S3_PRESIGN_CACHE_SIZE", "10000"))
+
+
+class S3Storage:
+    """Async facade over a pooled boto3 client running on a bounded executor."""
+
+    def __init__(self, bucket: str, client=None, max_concurrency: int = S3_MAX_CONCURRENCY):
+        self.bucket = bucket
+        self.client = client or boto3.client(
+            "s3",
+            aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+            aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
+            region_name=os.getenv("AWS_REGION"),
+            endpoint_url=S3_ENDPOINT_URL,
+            config=Config(max_pool_connections=max_concurrency),
+        )
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="s3")
+        # (key, expires_in) -> signed url, stable URLs let browsers and CDNs cache the objects
+        self._presigned_urls = LRUCache("presigned_urls", max_size=S3_PRESIGN_CACHE_SIZE)
+
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    async def upload(self, filename: str, file_bytes: bytes) -> str:
+        try:
+            await self._run(self.client.put_object, Bucket=self.bucket, Key=filename, Body=file_bytes)
+            # A fresh signature gives overwritten objects a new URL, busting browser caches
+            self._presigned_urls.delete((filename, S3_PRESIGN_EXPIRES_IN))
+            return f"https://{self.bucket}.s3.amazonaws.com/{filename}"
+        except (BotoCoreError, NoCredentialsError) as e:
+            logger.exception("S3 upload failed")
+            raise RuntimeError("Failed to upload to S3") from e
+
+    async def download(self, filepath: str) -> bytes:
+        def get_object():
+            response = self.client.get_object(Bucket=self.bucket, Key=filepath)
+            return response['Body'].read()
+
+        try:
+            return await self._run(get_object)
+        except (BotoCoreError, NoCredentialsError) as e:
+            logger.exception("S3 download failed")
+            raise RuntimeError("Failed to download from S3") from e
+
+    async def presign(self, filepath: str, expires_in: int = S3_PRESIGN_EXPIRES_IN) -> str:
+        if "amazonaws.com/" in filepath:
+            filepath = filepath.split("amazonaws.com/")[1]
+        cache_key = (filepath, expires_in)
+        url = self._presigned_urls.get(cache_key)
+        if url is not None:
+            return url
+        try:
+            # Signing is local CPU work, no need for the executor
+            signed_at = time.time()
+            url = self.client.generate_presigned_url('get_object', Params={'Bucket': self.bucket, 'Key': filepath}, ExpiresIn=expires_in)
+            if expires_in > S3_PRESIGN_SAFETY_MARGIN:
+                self._presigned_urls.set(cache_key, url, expires_at=signed_at + expires_in - S3_PRESIGN_SAFETY_MARGIN)
+            return url
+        except (BotoCoreError, NoCredentialsError) as e:
+            logger.exception("S3 presigned url generation failed")
+            raise RuntimeError("Failed to generate presigned url") from e
+
+    async def presign_many(self, filepaths: Iterable[Optional[str]], expires_in: int = S3_PRESIGN_EXPIRES_IN) -> list[Optional[str]]:
+        """Presign a batch of keys/urls, passing None through so results line up with the input."""
+        return [await self.presign(filepath, expires_in) if filepath else None for filepath in filepaths]
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+_storage: Optional[S3Storage] = None
+
+
+def get_storage() -> S3Storage:
+    global _storage
+    if _storage is None:
+        _storage = S3Storage(BUCKET_NAME)
+    return _storage
+
+
+async def upload_file_to_s3(filename: str, file_bytes: bytes) -> str:
+    return await get_storage().upload(filename, file_bytes)
+
+async def get_file_from_s3(filepath: str) -> bytes:
+    return await get_storage().download(filepath)
+
+async def generate_presigned_url(filepath: str) -> str:
+    return await get_storage().presign(filepath)
 
-def upload_file_to_s3(filename: str, file_bytes: bytes) -> str:
-    try:
-        s3_client.put_object(Bucket=BUCKET_NAME, Key=filename, Body=file_bytes)
-        return f"https://{BUCKET_NAME}.s3.amazonaws.com/{filename}"
-    except (BotoCoreError, NoCredentialsError) as e:
-        logger.exception("S3 upload failed")
-        raise RuntimeError("Failed to upload to S3") from e
-
-def get_file_from_s3(filepath: str) -> bytes:
-    try:
-        response = s3_client.get_object(Bucket=BUCKET_NAME, Key=filepath)
-        return response['Body'].read()
-    except (BotoCoreError, NoCredentialsError) as e:
-        logger.exception("S3 download failed")
-        raise RuntimeError("Failed to download from S3") from e
-
-def generate_presigned_url(filepath: str) -> str:
-    if "amazonaws.com/" in filepath:
-        filepath = filepath.split("amazonaws.com/")[1]
-    try:
-        response = s3_client.generate_presigned_url('get_object', Params={'Bucket': BUCKET_NAME, 'Key': filepath}, ExpiresIn=3600)
-        return response
-    except (BotoCoreError, NoCredentialsError) as e:
-        logger.exception("S3 presigned url generation failed")
-        raise RuntimeError("Failed to generate presigned url") from e
\ No newline at end of file
+async def generate_presigned_urls(filepaths: Iterable[Optional[str]]) -> list[Optional[str]]:
+    return await get_storage().presign_many(filepaths)
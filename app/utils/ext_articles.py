@@ -19,6 +19,3 @@ def scrape_article(url: str):
         "summary": article.summary,
         "html": article.html,
     }
-    
-def to_pgvector(vec):
-    return "[" + ",".join(f"{x:.6f}" for x in vec) + "]"
\ No newline at end of file
@@ -0,0 +1,73 @@
+"""
+Dependency-aware async stage graph.
+
+Each stage is a coroutine function receiving the results of its dependencies.
+Stages start as soon as their dependencies finish, so independent branches
+run concurrently and the total latency follows the slowest path.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+from app.core.logging import logger
+
+
+StageFn = Callable[[dict[str, Any]], Awaitable[Any]]
+
+
+class StageError(Exception):
+    def __init__(self, stage: str, message: str):
+        super().__init__(f"Stage '{stage}' failed: {message}")
+        self.stage = stage
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: StageFn
+    deps: tuple[str, ...] = ()
+    timeout: Optional[float] = None
+
+
+@dataclass
+class StageGraph:
+    name: str
+    stages: dict[str, Stage] = field(default_factory=dict)
+
+    def add(self, name: str, fn: StageFn, deps: tuple[str, ...] = (), timeout: Optional[float] = None) -> "StageGraph":
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        for dep in deps:
+            if dep not in self.stages:
+                # Requiring deps to exist first also rules out cycles
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'")
+        self.stages[name] = Stage(name=name, fn=fn, deps=tuple(deps), timeout=timeout)
+        return self
+
+    async def _run_stage(self, stage: Stage, tasks: dict[str, asyncio.Task]) -> Any:
+        inputs = {dep: await tasks[dep] for dep in stage.deps}
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(stage.fn(inputs), timeout=stage.timeout)
+        except asyncio.TimeoutError:
+            raise StageError(stage.name, f"timed out after {stage.timeout}s")
+        logger.info("stage_complete", graph=self.name, stage=stage.name, duration=round(time.perf_counter() - start, 3))
+        return result
+
+    async def run(self) -> dict[str, Any]:
+        tasks: dict[str, asyncio.Task] = {}
+        for name, stage in self.stages.items():
+            tasks[name] = asyncio.create_task(self._run_stage(stage, tasks), name=f"{self.name}:{name}")
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            # Let cancelled stages unwind before surfacing the first error
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+        return {name: task.result() for name, task in tasks.items()}
@@ -1,3 +1,6 @@
+import base64
+import binascii
+import json
 import os
 from dotenv import load_dotenv
 load_dotenv()
@@ -14,4 +17,20 @@ def parse_list_from_env(env_key, default=None):
     if "," not in value:
         return [value]
     # Split comma-separated values
-    return [item.strip() for item in value.split(",") if item.strip()]
\ No newline at end of file
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+def encode_cursor(payload: dict) -> str:
+    """Opaque pagination cursor: urlsafe base64 of compact JSON."""
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """Raises ValueError for anything encode_cursor did not produce."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError("Malformed cursor") from e
+    if not isinstance(payload, dict):
+        raise ValueError("Malformed cursor")
+    return payload
@@ -0,0 +1,83 @@
+"""
+Microbenchmark: binding a query vector as formatted text vs a binary pgvector parameter.
+
+  text:   "[0.012345,...]" built in Python, parsed by Postgres through ::vector
+  binary: float32 numpy array sent in pgvector's binary format by the adapters
+          registered on the engine (app.database.database)
+
+Reports client side encoding time, bytes per parameter and round trip latency
+of a query that binds the vector twice, so only binding and parsing differ.
+
+Usage:
+    python scripts/bench_vector_binding.py --iterations 500 --dimensions 1536
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import numpy as np
+from pgvector import Vector
+from sqlalchemy import text
+
+from app.database.database import AsyncSessionLocal
+
+
+def to_text_param(vec) -> str:
+    # The string formatting search queries used before the adapters were registered
+    return "[" + ",".join(f"{x:.6f}" for x in vec) + "]"
+
+
+def time_encoding(vectors: list[np.ndarray]) -> dict:
+    start = time.perf_counter()
+    texts = [to_text_param(vec) for vec in vectors]
+    text_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    binaries = [Vector(vec).to_binary() for vec in vectors]
+    binary_seconds = time.perf_counter() - start
+
+    return {
+        "text": {"encode_us": text_seconds / len(vectors) * 1e6, "bytes": statistics.mean(len(t.encode()) for t in texts)},
+        "binary": {"encode_us": binary_seconds / len(vectors) * 1e6, "bytes": statistics.mean(len(b) for b in binaries)},
+    }
+
+
+async def time_round_trips(vectors: list, convert) -> list[float]:
+    sql = text("SELECT (:a)::vector <#> (:b)::vector")
+    timings = []
+    async with AsyncSessionLocal() as db:
+        # Warm up the connection and the adapters
+        await db.execute(sql, {"a": convert(vectors[0]), "b": convert(vectors[0])})
+        for vec in vectors:
+            start = time.perf_counter()
+            await db.execute(sql, {"a": convert(vec), "b": convert(vec)})
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def main(iterations: int, dimensions: int) -> None:
+    rng = np.random.default_rng(0)
+    vectors = [rng.standard_normal(dimensions).astype(np.float32) for _ in range(iterations)]
+
+    encoding = time_encoding(vectors)
+    text_timings = await time_round_trips(vectors, to_text_param)
+    binary_timings = await time_round_trips(vectors, lambda vec: vec)
+
+    print(f"{iterations} iterations, {dimensions} dimensions")
+    for name, timings in (("text", text_timings), ("binary", binary_timings)):
+        print(
+            f"  {name:<6} encode {encoding[name]['encode_us']:8.1f}us  "
+            f"param {encoding[name]['bytes']:8.0f}B  "
+            f"round trip p50 {statistics.median(timings) * 1000:.2f}ms "
+            f"p95 {np.percentile(timings, 95) * 1000:.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare text and binary vector parameter binding")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations, args.dimensions))
@@ -0,0 +1,83 @@
+"""
+Compare full precision and halfvec search on a live database.
+
+Samples stored embeddings as queries, takes the exact top-k over `embedding`
+(sequential scan, no index) as ground truth and checks how much of it the
+HNSW index on `embedding_half` returns. Also prints table and index sizes.
+
+Usage:
+    python scripts/halfvec_recall.py --table external_articles --queries 100 --k 10
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+
+from app.database.database import AsyncSessionLocal
+from app.database.vector_search import distance_sql
+
+
+async def top_k(db, table: str, storage: str, embedding: str, k: int, exact: bool) -> tuple[list, float]:
+    # SET LOCAL only lasts until the end of the current transaction
+    await db.execute(text(f"SET LOCAL enable_indexscan = {'off' if exact else 'on'}"))
+    start = time.perf_counter()
+    result = await db.execute(
+        text(f"SELECT id FROM {table} ORDER BY {distance_sql(storage=storage)} LIMIT :k"),
+        {"embedding": embedding, "k": k},
+    )
+    ids = [row[0] for row in result.all()]
+    elapsed = time.perf_counter() - start
+    await db.commit()
+    return ids, elapsed
+
+
+async def sizes(db, table: str) -> dict:
+    result = await db.execute(
+        text("""
+            SELECT c.relname, pg_size_pretty(pg_relation_size(c.oid))
+            FROM pg_class c
+            WHERE c.relname = :table
+               OR c.oid IN (SELECT indexrelid FROM pg_index WHERE indrelid = CAST(:table AS regclass))
+        """),
+        {"table": table},
+    )
+    return dict(result.all())
+
+
+async def main(table: str, queries: int, k: int) -> None:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            text(f"SELECT embedding::text FROM {table} WHERE embedding IS NOT NULL ORDER BY random() LIMIT :n"),
+            {"n": queries},
+        )
+        samples = [row[0] for row in result.all()]
+        await db.commit()
+
+        recalls, exact_times, half_times = [], [], []
+        for embedding in samples:
+            exact_ids, exact_time = await top_k(db, table, "vector", embedding, k, exact=True)
+            half_ids, half_time = await top_k(db, table, "halfvec", embedding, k, exact=False)
+            recalls.append(len(set(exact_ids) & set(half_ids)) / max(len(exact_ids), 1))
+            exact_times.append(exact_time)
+            half_times.append(half_time)
+
+        relation_sizes = await sizes(db, table)
+
+    print(f"{table}: {len(samples)} queries, k={k}")
+    print(f"  recall@{k}: {statistics.mean(recalls):.4f} (min {min(recalls):.2f})")
+    print(f"  exact vector  p50 {statistics.median(exact_times) * 1000:.1f}ms")
+    print(f"  halfvec hnsw  p50 {statistics.median(half_times) * 1000:.1f}ms")
+    for name, size in relation_sizes.items():
+        print(f"  {name}: {size}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure halfvec recall against exact search")
+    parser.add_argument("--table", choices=["thoughts", "external_articles"], default="external_articles")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.table, args.queries, args.k))
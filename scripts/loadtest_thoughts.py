@@ -0,0 +1,84 @@
+"""
+Load test: concurrent /thoughts/{id} reads while a slow /thoughts/create is in flight.
+
+Measures read latency on its own (baseline) and again while creates are running
+against the same worker. With a blocking router the reads queue up behind the
+create and their latency approaches the create latency; with the async router
+they should stay close to the baseline.
+
+Usage (needs httpx, in requirements.txt):
+    AUGMENT_TOKEN=<clerk jwt> python scripts/loadtest_thoughts.py \
+        --base-url http://localhost:8000 --thought-id <existing id> --reads 50 --creates 2
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+
+
+async def timed(coro):
+    start = time.perf_counter()
+    response = await coro
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def run_reads(client: httpx.AsyncClient, thought_id: str, n: int) -> list[float]:
+    return await asyncio.gather(*[timed(client.get(f"/thoughts/{thought_id}")) for _ in range(n)])
+
+
+async def run_create(client: httpx.AsyncClient, text: str, image_path: str | None) -> float:
+    files = {}
+    if image_path:
+        files["image"] = ("image.png", open(image_path, "rb").read(), "image/png")
+    return await timed(client.post("/thoughts/create", data={"text": text}, files=files or None))
+
+
+def summarize(label: str, latencies: list[float]) -> None:
+    latencies = sorted(latencies)
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+    print(f"{label:<28} n={len(latencies):<4} p50={statistics.median(latencies) * 1000:8.1f}ms "
+          f"p95={p95 * 1000:8.1f}ms max={latencies[-1] * 1000:8.1f}ms")
+
+
+async def main(args):
+    headers = {"Authorization": f"Bearer {os.environ['AUGMENT_TOKEN']}"}
+    async with httpx.AsyncClient(base_url=args.base_url, headers=headers, timeout=120) as client:
+        # Warm up auth caches and connections
+        await run_reads(client, args.thought_id, 2)
+
+        baseline = await run_reads(client, args.thought_id, args.reads)
+        summarize("reads (idle)", baseline)
+
+        creates = [
+            asyncio.create_task(run_create(client, f"load test thought {i}", args.image))
+            for i in range(args.creates)
+        ]
+        # Give the creates a head start so the reads land while they are in flight
+        await asyncio.sleep(args.delay)
+        during = await run_reads(client, args.thought_id, args.reads)
+        create_latencies = await asyncio.gather(*creates)
+
+        summarize("reads (during create)", during)
+        summarize("creates", create_latencies)
+
+        slowest_create = max(create_latencies)
+        if statistics.median(during) > 0.5 * slowest_create:
+            print("reads are serializing behind /thoughts/create")
+        else:
+            print("reads are served concurrently with /thoughts/create")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--thought-id", required=True)
+    parser.add_argument("--reads", type=int, default=50)
+    parser.add_argument("--creates", type=int, default=1)
+    parser.add_argument("--image", default=None, help="optional image to make the create slower")
+    parser.add_argument("--delay", type=float, default=0.2)
+    asyncio.run(main(parser.parse_args()))